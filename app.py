@@ -1,20 +1,26 @@
 import dash
 from dash import dcc, html, Input, Output, State, dash_table
+from flask import g, has_request_context
 import pandas as pd
 import dash_bootstrap_components as dbc
 import plotly.express as px
 from datetime import timedelta
+from functools import lru_cache
+from dash.exceptions import PreventUpdate
 
-from src.data_loader import fetch_from_arcgis_api
+from src.data_loader import fetch_from_arcgis_api, fetch_port_locations
 from src.preprocess import clean_and_engineer
-from src.analytics import generate_kpis, detect_anomalies
+from src.analytics import generate_kpis, detect_anomalies, aggregate_port_locations, bin_port_locations
+from src.columnar import to_private_frame
+from src.materialize import DEFAULT_SAMPLE_FRACTION, Snapshot, SnapshotStore
 from src.visualizations import (
     plot_traffic_time_series,
     plot_forecast,
     plot_top_ports,
     plot_import_export,
     plot_traffic_pie,
-    plot_heatmap
+    plot_heatmap,
+    plot_port_map
 )
 
 # Initialize Dash app
@@ -24,96 +30,172 @@ app = dash.Dash(
     suppress_callback_exceptions=True,
     external_stylesheets=[dbc.themes.BOOTSTRAP]
 )
+server = app.server  # WSGI entry point: `gunicorn -w 8 app:server`
+
+# -----------------------------------
+# DATA: MATERIALIZED SNAPSHOT OR LAZY LOAD
+# -----------------------------------
+# Snapshots are produced offline by `python -m src.materialize`. When one is
+# published, every worker attaches to the same memory-mapped, read-only copy
+# of the engineered dataset and only does lookups; newer snapshots are picked
+# up at the start of the next request. Without a snapshot, fall back to
+# fetching and engineering in-process, sampled like a default snapshot so
+# totals do not depend on whether one exists.
+snapshot_store = SnapshotStore()
+MAX_RAW_ROWS = 5000  # Rows shipped to the browser by the Raw Data tab
+
+
+def load_dashboard_data():
+    snapshot = snapshot_store.refresh()
+    if snapshot is not None:
+        return snapshot.data
+
+    raw_data = fetch_from_arcgis_api(sample_fraction=DEFAULT_SAMPLE_FRACTION)
+    return clean_and_engineer(raw_data, locations=fetch_port_locations())
+
+
+full_data = load_dashboard_data()
 
-# Load and preprocess data
-raw_data = fetch_from_arcgis_api(sample_fraction=0.05)
-full_data = clean_and_engineer(raw_data)
 
-# Default 2-year range
-default_end = full_data["DATE"].max()
-default_start = default_end - pd.DateOffset(years=2)
+@server.before_request
+def pin_dashboard_data():
+    # Swap versions only at a request boundary and pin the frame for the
+    # rest of the request, so one callback never mixes two snapshots.
+    global full_data
+    previous = snapshot_store.current
+    if snapshot_store.refresh() is not previous:
+        full_data = snapshot_store.current.data
+    g.dashboard_data = full_data
+    g.snapshot = snapshot_store.current
+
+
+def current_data():
+    return g.get("dashboard_data", full_data) if has_request_context() else full_data
+
+
+def default_view_snapshot(port, start_date, end_date):
+    snapshot = current_snapshot()
+    if snapshot is not None and snapshot.is_default_view(port, start_date, end_date):
+        return snapshot
+    return None
+
+
+def filter_df(df, port, start_date, end_date, columns=None):
+    # One copy of just the needed rows and columns; the shared frame itself
+    # is never copied or decoded.
+    mask = (df["DATE"] >= start_date) & (df["DATE"] <= end_date)
+    if port:
+        mask &= df['PORT'].isin(port)
+    columns = [c for c in columns if c in df.columns] if columns else Snapshot.ui_columns(df)
+    return to_private_frame(df, rows=mask, columns=columns)
+
+
+def needed_columns(df, tab, metric):
+    if tab in ('kpi', 'forecast', 'insights'):
+        base = ['DATE', 'PORT', 'COUNTRY', metric, 'ROLLING_AVG_TRAFFIC', 'TOTAL_IMPORT', 'TOTAL_EXPORT']
+        return list(dict.fromkeys(c for c in base if c in df.columns))
+    if tab == 'map':
+        return [c for c in ['PORT_ID', 'PORT', 'COUNTRY', 'LAT', 'LON', metric] if c in df.columns]
+    return None
+
 
 # -----------------------------------
 # DASHBOARD LAYOUT
 # -----------------------------------
-app.layout = dbc.Container([
-    html.H2("📱 IMF PortWatch Analytics Dashboard", className="text-center my-4 text-primary"),
-
-    dcc.Store(id='cached-data', data=full_data.to_dict('records')),
-
-    dbc.Row([
-        dbc.Col([
-            dcc.Dropdown(
-                id='port-dropdown',
-                options=[{'label': p, 'value': p} for p in sorted(full_data['PORT'].unique())],
-                placeholder="Select a Port (optional)",
-                multi=True
-            )
-        ], width=4),
-
-        dbc.Col([
-            dcc.DatePickerRange(
-                id='date-range',
-                start_date=default_start,
-                end_date=default_end,
-                display_format='YYYY-MM-DD',
-                min_date_allowed=full_data["DATE"].min(),
-                max_date_allowed=full_data["DATE"].max()
-            )
-        ], width=4),
-
-        dbc.Col([
-            dcc.Dropdown(
-                id='metric-dropdown',
-                options=[
-                    {'label': 'Port Calls (Traffic)', 'value': 'TRAFFIC'},
-                    {'label': 'Total Import Volume', 'value': 'TOTAL_IMPORT'},
-                    {'label': 'Total Export Volume', 'value': 'TOTAL_EXPORT'},
-                    {'label': 'Total Trade Volume', 'value': 'TOTAL_TRADE_VOLUME'}
-                ],
-                value='TRAFFIC'
-            )
-        ], width=5)
-    ], className='mb-3'),
-
-    html.Div(id='kpi-output', className='mb-4'),
-
-    dcc.Tabs(id="tabs", value='forecast', children=[
-        dcc.Tab(label='📈 Forecast & Trends', value='forecast', className='fw-bold'),
-        dcc.Tab(label='📊 Insights (Top Ports, Pie, Heatmap)', value='insights', className='fw-bold'),
-        dcc.Tab(label='📟 Raw Data Snapshot', value='raw', className='fw-bold')
-    ], className="mb-3"),
-
-    dcc.Loading(html.Div(id='tab-content'), type="default"),
-
-    html.Div([
-        html.Button("⬇️ Download CSV", id="btn_csv", className='me-2 btn btn-outline-primary'),
-        dcc.Download(id="download-dataframe-csv"),
-
-        html.Button("⬇️ Download Excel", id="btn_excel", className='btn btn-outline-success'),
-        dcc.Download(id="download-dataframe-xlsx")
-    ], className='my-4 text-center')
-])
+def current_snapshot():
+    return g.get("snapshot", snapshot_store.current) if has_request_context() else snapshot_store.current
+
+
+def serve_layout():
+    data = current_data()
+    snapshot = current_snapshot()
+
+    # Default range: the snapshot's materialized window (so precomputed
+    # artifacts match), otherwise the last 2 years
+    if snapshot is not None:
+        default_start, default_end = snapshot.default_start, snapshot.default_end
+    else:
+        default_end = data["DATE"].max()
+        default_start = default_end - pd.DateOffset(years=2)
+
+    return dbc.Container([
+        html.H2("📱 IMF PortWatch Analytics Dashboard", className="text-center my-4 text-primary"),
+
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id='port-dropdown',
+                    options=[{'label': p, 'value': p} for p in sorted(data['PORT'].unique())],
+                    placeholder="Select a Port (optional)",
+                    multi=True
+                )
+            ], width=4),
+
+            dbc.Col([
+                dcc.DatePickerRange(
+                    id='date-range',
+                    start_date=default_start,
+                    end_date=default_end,
+                    display_format='YYYY-MM-DD',
+                    min_date_allowed=data["DATE"].min(),
+                    max_date_allowed=data["DATE"].max()
+                )
+            ], width=4),
+
+            dbc.Col([
+                dcc.Dropdown(
+                    id='metric-dropdown',
+                    options=[
+                        {'label': 'Port Calls (Traffic)', 'value': 'TRAFFIC'},
+                        {'label': 'Total Import Volume', 'value': 'TOTAL_IMPORT'},
+                        {'label': 'Total Export Volume', 'value': 'TOTAL_EXPORT'},
+                        {'label': 'Total Trade Volume', 'value': 'TOTAL_TRADE_VOLUME'}
+                    ],
+                    value='TRAFFIC'
+                )
+            ], width=5)
+        ], className='mb-3'),
+
+        html.Div(id='kpi-output', className='mb-4'),
+
+        dcc.Tabs(id="tabs", value='forecast', children=[
+            dcc.Tab(label='📈 Forecast & Trends', value='forecast', className='fw-bold'),
+            dcc.Tab(label='📊 Insights (Top Ports, Pie, Heatmap)', value='insights', className='fw-bold'),
+            dcc.Tab(label='🗺️ Port Map', value='map', className='fw-bold'),
+            dcc.Tab(label='📟 Raw Data Snapshot', value='raw', className='fw-bold')
+        ], className="mb-3"),
+
+        dcc.Loading(html.Div(id='tab-content'), type="default"),
+
+        html.Div([
+            html.Button("⬇️ Download CSV", id="btn_csv", className='me-2 btn btn-outline-primary'),
+            dcc.Download(id="download-dataframe-csv"),
+
+            html.Button("⬇️ Download Excel", id="btn_excel", className='btn btn-outline-success'),
+            dcc.Download(id="download-dataframe-xlsx")
+        ], className='my-4 text-center')
+    ])
+
+
+app.layout = serve_layout
 
 # -----------------------------------
 # KPI CALLBACK
 # -----------------------------------
 @app.callback(
     Output('kpi-output', 'children'),
-    Input('cached-data', 'data'),
     Input('port-dropdown', 'value'),
     Input('date-range', 'start_date'),
     Input('date-range', 'end_date'),
     Input('metric-dropdown', 'value')
 )
-def update_kpis(data, port, start_date, end_date, metric):
-    df = pd.DataFrame(data)
-    df["DATE"] = pd.to_datetime(df["DATE"])
+def update_kpis(port, start_date, end_date, metric):
+    snapshot = default_view_snapshot(port, start_date, end_date)
+    if snapshot is not None and snapshot.lookup(metric, 'kpis'):
+        return generate_kpis(None, metric=metric, kpis=snapshot.lookup(metric, 'kpis'))
 
-    if port:
-        df = df[df['PORT'].isin(port)]
-
-    df = df[(df['DATE'] >= start_date) & (df['DATE'] <= end_date)]
+    data = current_data()
+    df = filter_df(data, port, start_date, end_date, columns=needed_columns(data, 'kpi', metric))
     df = detect_anomalies(df, metric=metric)
 
     if df.empty:
@@ -127,21 +209,31 @@ def update_kpis(data, port, start_date, end_date, metric):
 @app.callback(
     Output('tab-content', 'children'),
     Input('tabs', 'value'),
-    State('cached-data', 'data'),
     State('port-dropdown', 'value'),
     State('date-range', 'start_date'),
     State('date-range', 'end_date'),
     State('metric-dropdown', 'value')
 )
-def render_tab(tab, data, port, start_date, end_date, metric):
-    df = pd.DataFrame(data)
-    df["DATE"] = pd.to_datetime(df["DATE"])
+def render_tab(tab, port, start_date, end_date, metric):
+    if tab == 'map':
+        # Served from the cached per-port totals; needs none of the work below.
+        return dcc.Graph(
+            id='port-map',
+            figure=render_port_map(port, start_date, end_date, metric),
+            style={'height': '500px'}
+        )
 
-    if port:
-        df = df[df['PORT'].isin(port)]
+    snapshot = default_view_snapshot(port, start_date, end_date)
 
-    df = df[(df['DATE'] >= start_date) & (df['DATE'] <= end_date)]
-    df = detect_anomalies(df, metric=metric)
+    def lookup(artifact):
+        return snapshot.lookup(metric, artifact) if snapshot is not None else None
+
+    if snapshot is not None:
+        df = snapshot.default_view(metric, columns=needed_columns(snapshot.data, tab, metric))
+    else:
+        data = current_data()
+        df = filter_df(data, port, start_date, end_date, columns=needed_columns(data, tab, metric))
+        df = detect_anomalies(df, metric=metric)
 
     if df.empty:
         return html.Div("⚠️ No data in selected range or port.", className="text-warning")
@@ -149,20 +241,26 @@ def render_tab(tab, data, port, start_date, end_date, metric):
     if tab == 'forecast':
         return html.Div([
             dcc.Graph(figure=plot_traffic_time_series(df, metric=metric), style={'height': '500px'}),
-            dcc.Graph(figure=plot_forecast(df, metric=metric), style={'height': '500px'}),
+            dcc.Graph(figure=plot_forecast(df, metric=metric, forecast_df=lookup('forecast')), style={'height': '500px'}),
             dcc.Graph(figure=plot_import_export(df), style={'height': '500px'})
         ])
 
     elif tab == 'insights':
         return html.Div([
-            dcc.Graph(figure=plot_top_ports(df, metric=metric), style={'height': '500px'}),
-            dcc.Graph(figure=plot_traffic_pie(df, metric=metric), style={'height': '500px'}),
+            dcc.Graph(figure=plot_top_ports(df, metric=metric, top_df=lookup('top_ports')), style={'height': '500px'}),
+            dcc.Graph(figure=plot_traffic_pie(df, metric=metric, summary=lookup('country_shares')), style={'height': '500px'}),
             dcc.Graph(figure=plot_heatmap(df, metric=metric), style={'height': '500px'})
         ])
 
     elif tab == 'raw':
-        return dash_table.DataTable(
-            data=df.to_dict('records'),
+        # The table renders client-side, so ship a bounded slice; the
+        # download buttons export the full selection.
+        note = html.Div(
+            f"Showing the first {MAX_RAW_ROWS:,} of {len(df):,} rows — use the downloads for the full selection.",
+            className="text-muted mb-2"
+        ) if len(df) > MAX_RAW_ROWS else None
+        return html.Div([note, dash_table.DataTable(
+            data=df.head(MAX_RAW_ROWS).to_dict('records'),
             columns=[{"name": i, "id": i} for i in df.columns],
             page_size=20,
             sort_action='native',
@@ -173,42 +271,80 @@ def render_tab(tab, data, port, start_date, end_date, metric):
                 'minWidth': '120px', 'maxWidth': '250px', 'whiteSpace': 'normal'
             },
             style_header={'backgroundColor': '#003366', 'color': 'white'}
-        )
+        )])
 
 # -----------------------------------
-# DOWNLOAD CALLBACKS
+# PORT MAP CALLBACK
 # -----------------------------------
-def filter_df(data, port, start_date, end_date):
-    df = pd.DataFrame(data)
-    df["DATE"] = pd.to_datetime(df["DATE"])
-    if port:
-        df = df[df['PORT'].isin(port)]
-    return df[(df["DATE"] >= start_date) & (df["DATE"] <= end_date)]
+@lru_cache(maxsize=32)
+def cached_port_locations(data_version, ports, start_date, end_date, metric):
+    # Per-port totals only change with the filters or the data version, so
+    # pan/zoom requests just re-bin this small frame.
+    data = current_data()
+    df = filter_df(data, list(ports), start_date, end_date, columns=needed_columns(data, 'map', metric))
+    if not {'LAT', 'LON'}.issubset(df.columns):
+        return None
+    return aggregate_port_locations(df, metric=metric)
+
+
+def render_port_map(port, start_date, end_date, metric, zoom=0, center=None, bounds=None):
+    snapshot = current_snapshot()
+    data_version = snapshot.version if snapshot is not None else "live"
+    ports = cached_port_locations(data_version, tuple(port or ()), start_date, end_date, metric)
+    if ports is None:
+        return plot_port_map(None, metric=metric)
 
+    points = bin_port_locations(ports, metric=metric, zoom=zoom, bounds=bounds)
+    return plot_port_map(points, metric=metric, zoom=zoom, center=center)
+
+
+@app.callback(
+    Output('port-map', 'figure'),
+    Input('port-map', 'relayoutData'),
+    State('port-dropdown', 'value'),
+    State('date-range', 'start_date'),
+    State('date-range', 'end_date'),
+    State('metric-dropdown', 'value'),
+    prevent_initial_call=True
+)
+def update_port_map(relayout, port, start_date, end_date, metric):
+    if not relayout or 'map.zoom' not in relayout:
+        raise PreventUpdate
+
+    bounds = None
+    corners = relayout.get('map._derived', {}).get('coordinates')
+    if corners:
+        lons, lats = zip(*corners)
+        bounds = (min(lons), min(lats), max(lons), max(lats))
+
+    return render_port_map(port, start_date, end_date, metric,
+                           zoom=relayout['map.zoom'], center=relayout.get('map.center'), bounds=bounds)
+
+# -----------------------------------
+# DOWNLOAD CALLBACKS
+# -----------------------------------
 @app.callback(
     Output("download-dataframe-csv", "data"),
     Input("btn_csv", "n_clicks"),
-    State("cached-data", "data"),
     State('port-dropdown', 'value'),
     State('date-range', 'start_date'),
     State('date-range', 'end_date'),
     prevent_initial_call=True
 )
-def download_csv(n_clicks, data, port, start_date, end_date):
-    df = filter_df(data, port, start_date, end_date)
+def download_csv(n_clicks, port, start_date, end_date):
+    df = filter_df(current_data(), port, start_date, end_date)
     return dcc.send_data_frame(df.to_csv, "portwatch_filtered.csv")
 
 @app.callback(
     Output("download-dataframe-xlsx", "data"),
     Input("btn_excel", "n_clicks"),
-    State("cached-data", "data"),
     State('port-dropdown', 'value'),
     State('date-range', 'start_date'),
     State('date-range', 'end_date'),
     prevent_initial_call=True
 )
-def download_excel(n_clicks, data, port, start_date, end_date):
-    df = filter_df(data, port, start_date, end_date)
+def download_excel(n_clicks, port, start_date, end_date):
+    df = filter_df(current_data(), port, start_date, end_date)
     return dcc.send_data_frame(df.to_excel, "portwatch_filtered.xlsx", sheet_name="Report")
 
 # -----------------------------------
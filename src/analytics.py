@@ -5,23 +5,13 @@ from prophet import Prophet
 # -------------------------
 # KPI GENERATOR
 # -------------------------
-def generate_kpis(df: pd.DataFrame, metric: str = 'TRAFFIC') -> html.Div:
+def compute_kpi_values(df: pd.DataFrame, metric: str = 'TRAFFIC') -> dict:
     if df.empty or metric not in df.columns or 'DATE' not in df.columns:
-        return html.Div("⚠️ No data available or invalid metric.")
+        return {}
 
     df = df.copy()
     df['DATE'] = pd.to_datetime(df['DATE'])
 
-    total = df[metric].sum()
-    avg = df[metric].mean()
-    std = df[metric].std(ddof=0)
-    min_val = df[metric].min()
-    max_val = df[metric].max()
-
-    anomalies = df['ANOMALY'].sum() if 'ANOMALY' in df.columns else 0
-    latest_date = df['DATE'].max().date()
-    earliest_date = df['DATE'].min().date()
-
     # Week-over-week trend
     current_week = df[df['DATE'] >= df['DATE'].max() - pd.Timedelta(days=6)]
     prev_week = df[(df['DATE'] < df['DATE'].max() - pd.Timedelta(days=6)) &
@@ -31,6 +21,37 @@ def generate_kpis(df: pd.DataFrame, metric: str = 'TRAFFIC') -> html.Div:
     prev_avg = prev_week[metric].mean() if not prev_week.empty else 0
 
     delta_pct = ((current_avg - prev_avg) / prev_avg * 100) if prev_avg > 0 else None
+
+    return {
+        "metric": metric,
+        "total": float(df[metric].sum()),
+        "avg": float(df[metric].mean()),
+        "std": float(df[metric].std(ddof=0)),
+        "min": float(df[metric].min()),
+        "max": float(df[metric].max()),
+        "anomalies": int(df['ANOMALY'].sum()) if 'ANOMALY' in df.columns else 0,
+        "latest_date": df['DATE'].max().date().isoformat(),
+        "earliest_date": df['DATE'].min().date().isoformat(),
+        "delta_pct": float(delta_pct) if delta_pct is not None else None
+    }
+
+
+def generate_kpis(df: pd.DataFrame, metric: str = 'TRAFFIC', kpis: dict = None) -> html.Div:
+    if kpis is None:
+        kpis = compute_kpi_values(df, metric=metric)
+    if not kpis:
+        return html.Div("⚠️ No data available or invalid metric.")
+
+    total = kpis["total"]
+    avg = kpis["avg"]
+    std = kpis["std"]
+    min_val = kpis["min"]
+    max_val = kpis["max"]
+    anomalies = kpis["anomalies"]
+    latest_date = kpis["latest_date"]
+    earliest_date = kpis["earliest_date"]
+    delta_pct = kpis["delta_pct"]
+
     trend_symbol = "🔼" if delta_pct and delta_pct > 0 else "🔽" if delta_pct and delta_pct < 0 else "⏺"
     trend_color = "green" if delta_pct and delta_pct > 0 else "red" if delta_pct and delta_pct < 0 else "gray"
 
@@ -140,3 +161,89 @@ def get_top_ports(df: pd.DataFrame, metric: str = 'TRAFFIC', top_n: int = 5) ->
         .reset_index()
         .rename(columns={metric: f"TOTAL_{metric.upper()}"})
     )
+
+
+# -------------------------
+# COUNTRY SHARES
+# -------------------------
+def get_country_shares(df: pd.DataFrame, metric: str = 'TRAFFIC', top_n: int = 10) -> pd.Series:
+    if 'COUNTRY' not in df.columns or metric not in df.columns:
+        raise ValueError(f"Columns 'COUNTRY' and '{metric}' are required.")
+
+    return df.groupby("COUNTRY")[metric].sum().sort_values(ascending=False).head(top_n)
+
+
+# -------------------------
+# PORT MAP AGGREGATION
+# -------------------------
+MAP_CELLS_AT_ZOOM_0 = 32
+MAX_MAP_POINTS = 500
+
+
+def aggregate_port_locations(df: pd.DataFrame, metric: str = 'TRAFFIC') -> pd.DataFrame:
+    """
+    Per-port totals with coordinates, one row per PORT_ID (port names are not
+    unique across countries). PORT is carried along as the label.
+    """
+    if metric not in df.columns or not {'LAT', 'LON'}.issubset(df.columns):
+        raise ValueError(f"Columns 'LAT', 'LON' and '{metric}' are required.")
+
+    key = 'PORT_ID' if 'PORT_ID' in df.columns else 'PORT'
+    agg = {'LAT': 'first', 'LON': 'first', metric: 'sum'}
+    if key != 'PORT':
+        agg['PORT'] = 'first'
+    if 'COUNTRY' in df.columns:
+        agg['COUNTRY'] = 'first'
+
+    return df.dropna(subset=['LAT', 'LON']).groupby(key).agg(agg).reset_index()
+
+
+def bin_port_locations(ports: pd.DataFrame, metric: str = 'TRAFFIC', zoom: float = 0,
+                       bounds: tuple = None, max_points: int = MAX_MAP_POINTS) -> pd.DataFrame:
+    """
+    Clusters per-port totals into a zoom-dependent grid, keeping only the
+    visible cells, so the map payload stays bounded at any zoom level.
+
+    Args:
+        ports (pd.DataFrame): Output of `aggregate_port_locations`.
+        metric (str): Metric column to sum per cell.
+        zoom (float): Map zoom; each level halves the cell size.
+        bounds (tuple): Optional (lon_min, lat_min, lon_max, lat_max) viewport.
+        max_points (int): Upper bound on returned points (largest cells kept).
+
+    Returns:
+        pd.DataFrame: One row per cell with LAT, LON, metric, PORT_COUNT and LABEL.
+    """
+    if bounds is not None:
+        lon_min, lat_min, lon_max, lat_max = bounds
+        visible = ports['LAT'].between(lat_min, lat_max)
+        # Longitudes may be unwrapped past ±180 when the view crosses the antimeridian.
+        if lon_max - lon_min < 360:
+            visible &= ((ports['LON'] - lon_min) % 360) <= (lon_max - lon_min)
+        ports = ports[visible]
+
+    if ports.empty:
+        return pd.DataFrame(columns=['LAT', 'LON', metric, 'PORT_COUNT', 'LABEL'])
+
+    cell_size = 360 / (MAP_CELLS_AT_ZOOM_0 * 2 ** max(int(zoom), 0))
+    cells = ports.assign(
+        CELL_X=((ports['LON'] + 180) // cell_size).astype(int),
+        CELL_Y=((ports['LAT'] + 90) // cell_size).astype(int)
+    )
+
+    binned = cells.groupby(['CELL_X', 'CELL_Y']).agg(
+        LAT=('LAT', 'mean'),
+        LON=('LON', 'mean'),
+        VALUE=(metric, 'sum'),
+        PORT_COUNT=('PORT', 'size'),
+        FIRST_PORT=('PORT', 'first')
+    ).reset_index(drop=True).rename(columns={'VALUE': metric})
+
+    binned['LABEL'] = binned['FIRST_PORT'].where(binned['PORT_COUNT'] == 1,
+                                                 binned['PORT_COUNT'].astype(str) + " ports")
+    return (
+        binned.drop(columns='FIRST_PORT')
+        .sort_values(metric, ascending=False)
+        .head(max_points)
+        .reset_index(drop=True)
+    )
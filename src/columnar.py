@@ -0,0 +1,169 @@
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# -------------------------
+# Configuration
+# -------------------------
+SCHEMA_FILE = "schema.pkl"
+
+
+# -------------------------
+# Helper: Column Encoding
+# -------------------------
+def _encode_column(series: pd.Series) -> tuple:
+    """
+    Converts a column into a plain NumPy array that can be memory-mapped.
+
+    Object, string (``StringDtype``, the default for text in pandas >= 3) and
+    categorical columns are dictionary-encoded (integer codes + categories).
+    Timezone-aware datetimes are stored as naive UTC plus their timezone.
+    Nullable numeric extension dtypes are converted to their NumPy
+    equivalent (float64 when they hold missing values).
+
+    Returns:
+        tuple: (values, categories or None, timezone name or None)
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(), None, str(dtype.tz)
+
+    if dtype == object or isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        categorical = series.astype("category")
+        return categorical.cat.codes.to_numpy(), list(categorical.cat.categories), None
+
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        if not hasattr(dtype, "numpy_dtype"):
+            raise TypeError(f"❌ Unsupported column dtype for columnar storage: {series.name} ({dtype})")
+        if series.isna().any():
+            return series.to_numpy(dtype="float64", na_value=np.nan), None, None
+        return series.to_numpy(dtype=dtype.numpy_dtype), None, None
+
+    return series.to_numpy(), None, None
+
+
+# -------------------------
+# Writer
+# -------------------------
+def write_columnar(df: pd.DataFrame, directory: Path) -> Path:
+    """
+    Writes `df` as one `.npy` file per column plus a small schema file.
+
+    Args:
+        df (pd.DataFrame): Frame to persist. The index is not preserved.
+        directory (Path): Target directory (created if missing).
+
+    Returns:
+        Path: The directory written to.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    schema = []
+    for i, col in enumerate(df.columns):
+        values, categories, tz = _encode_column(df[col])
+        np.save(directory / f"{i}.npy", values, allow_pickle=False)
+        schema.append({"name": col, "file": f"{i}.npy", "categories": categories, "tz": tz})
+
+    with open(directory / SCHEMA_FILE, "wb") as f:
+        pickle.dump({"columns": schema, "rows": len(df)}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return directory
+
+
+# -------------------------
+# Reader
+# -------------------------
+def attach_columnar(directory: Path) -> pd.DataFrame:
+    """
+    Attaches to a directory written by `write_columnar` without reading it
+    into process memory.
+
+    Every column is opened with `np.load(mmap_mode='r')`, so all processes
+    attaching to the same files share the OS page cache and the arrays are
+    read-only. Columns are kept as separate blocks (`copy=False`) so pandas
+    does not consolidate them into a private copy.
+
+    Returns:
+        pd.DataFrame: Read-only, memory-mapped frame.
+    """
+    directory = Path(directory)
+    with open(directory / SCHEMA_FILE, "rb") as f:
+        schema = pickle.load(f)
+
+    columns = {}
+    for entry in schema["columns"]:
+        values = np.load(directory / entry["file"], mmap_mode="r", allow_pickle=False)
+        if entry["categories"] is not None:
+            values = pd.Categorical.from_codes(values, categories=entry["categories"])
+        elif entry.get("tz"):
+            # Rare; localizing makes a private copy of this column only.
+            values = pd.Series(values).dt.tz_localize("UTC").dt.tz_convert(entry["tz"]).array
+        columns[entry["name"]] = values
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(schema["rows"]), copy=False)
+
+
+def to_private_frame(df: pd.DataFrame, rows=None, columns: list = None) -> pd.DataFrame:
+    """
+    Copies the selected rows/columns of an attached frame into ordinary
+    process memory in a single pass, then decodes the selected categorical
+    columns back to objects so downstream groupbys and pivots behave as on a
+    freshly engineered frame.
+
+    Args:
+        df (pd.DataFrame): Attached (or in-memory) frame.
+        rows: Optional boolean mask selecting rows.
+        columns (list): Optional subset of columns; only these are copied and decoded.
+
+    Returns:
+        pd.DataFrame: Frame that no longer references the memory-mapped files.
+    """
+    if rows is None and columns is None:
+        df = df.copy()
+    else:
+        df = df.loc[rows if rows is not None else slice(None),
+                    columns if columns is not None else slice(None)]
+
+    categorical = {col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    if not categorical:
+        return df
+    # Rebuild column by column so the already-private non-categorical
+    # columns are not copied a second time.
+    return pd.DataFrame(
+        {col: df[col].astype(object) if col in categorical else df[col] for col in df.columns},
+        index=df.index,
+        copy=False
+    )
+
+
+# -------------------------
+# Helper: Shared-Memory Check
+# -------------------------
+def _is_memmap_backed(values) -> bool:
+    while values is not None:
+        # Copies of a memmap keep the subclass but drop the file mapping.
+        if isinstance(values, np.memmap) and getattr(values, "_mmap", None) is not None:
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+
+def unmapped_columns(df: pd.DataFrame) -> list:
+    """
+    Lists columns of an attached frame that are no longer backed by the
+    memory-mapped files (i.e. were copied into process memory).
+    """
+    copied = []
+    for col in df.columns:
+        values = df[col].array
+        if isinstance(values, pd.Categorical):
+            values = values.codes
+        else:
+            values = np.asarray(values)
+        if not _is_memmap_backed(values):
+            copied.append(col)
+    return copied
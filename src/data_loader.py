@@ -1,20 +1,50 @@
 import pandas as pd
 import requests
 import time
+import json
+import re
+import shutil
 import logging
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from io import StringIO
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.columnar import attach_columnar, to_private_frame, write_columnar
 
 # -------------------------
 # Configuration
 # -------------------------
 CACHE_PATH = Path("data/raw/port_traffic_csv_cache.csv")
+PARTIAL_PATH = Path("data/raw/port_traffic_csv_download.part")
 CACHE_TTL_SECONDS = 6 * 3600  # 6 hours
+REQUEST_TIMEOUT = (10, 60)  # (connect, read) seconds
+MAX_DOWNLOAD_ATTEMPTS = 5
+STALL_TIMEOUT_SECONDS = 120  # Give up when no bytes arrive for this long, across attempts
+DOWNLOAD_DEADLINE_SECONDS = 120  # Overall budget, applied only when a cached copy can be served instead
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BACKOFF_SECONDS = 1.0
+CHUNK_SIZE = 64 * 1024
 CSV_URL = (
     "https://hub.arcgis.com/api/v3/datasets/"
     "959214444157458aad969389b3ebe1a0_0/downloads/data"
     "?format=csv&spatialRefId=4326&where=1%3D1"
 )
+FEATURE_SERVICE_URL = (
+    "https://services9.arcgis.com/weJ1QsnbMYJlCHdG/arcgis/rest/services/"
+    "Daily_Ports_Data/FeatureServer/0/query"
+)
+PORTS_URL = (
+    "https://services9.arcgis.com/weJ1QsnbMYJlCHdG/arcgis/rest/services/"
+    "PortWatch_ports_database/FeatureServer/0/query"
+)
+PORT_LOCATIONS_PATH = Path("data/raw/port_locations.csv")
+PORT_LOCATIONS_TTL_SECONDS = 7 * 24 * 3600  # Port coordinates rarely change
+PARTITION_CACHE_DIR = Path("data/raw/port_traffic_partitions")
+PAGE_SIZE = 2000  # Typical maxRecordCount of a hosted feature layer
+MAX_WORKERS = 8
+MAX_PARTITION_ATTEMPTS = 3
 
 # -------------------------
 # Logger Setup
@@ -30,13 +60,269 @@ def is_cache_fresh(path: Path, ttl: int) -> bool:
     return path.exists() and (time.time() - path.stat().st_mtime) < ttl
 
 
+# -------------------------
+# Helper: HTTP Validators
+# -------------------------
+def load_validators(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_validators(path: Path, headers) -> None:
+    validators = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified")
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({k: v for k, v in validators.items() if v}))
+
+
+# -------------------------
+# Helper: Pooled Session with Retries
+# -------------------------
+_session = None
+
+
+def build_session(retries: int = 3, backoff_factor: float = RETRY_BACKOFF_SECONDS,
+                  pool_size: int = 10) -> requests.Session:
+    """
+    Creates a pooled HTTP session that retries connection errors and
+    transient status codes (429/5xx) with exponential backoff.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = build_session()
+    return _session
+
+
+_download_session = None
+
+
+def get_download_session() -> requests.Session:
+    # No adapter-level retries: download_csv is the only retry layer, so its
+    # deadline bounds the total time spent.
+    global _download_session
+    if _download_session is None:
+        _download_session = build_session(retries=0)
+    return _download_session
+
+
+# -------------------------
+# Helper: Retry-After / Content-Range
+# -------------------------
+def retry_after_seconds(value: str):
+    """Parses a Retry-After header (delta-seconds or HTTP date); None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def content_range_start(value: str):
+    """Returns the first byte of a `Content-Range: bytes START-END/TOTAL` header, or None."""
+    match = re.match(r"bytes\s+(\d+)-\d+/(\d+|\*)", value or "")
+    return int(match.group(1)) if match else None
+
+
+# -------------------------
+# Conditional + Resumable Download
+# -------------------------
+def download_csv(
+        url: str,
+        dest: Path = PARTIAL_PATH,
+        validators: dict = None,
+        session: requests.Session = None,
+        max_attempts: int = MAX_DOWNLOAD_ATTEMPTS,
+        backoff: float = RETRY_BACKOFF_SECONDS,
+        stall_timeout: float = STALL_TIMEOUT_SECONDS,
+        deadline: float = None
+):
+    """
+    Downloads `url` to `dest`, resuming interrupted transfers with HTTP Range.
+
+    Args:
+        url (str): CSV export URL.
+        dest (Path): Partial download file; kept between attempts and runs so
+            an interrupted transfer can resume where it stopped.
+        validators (dict): ETag / Last-Modified of the cached copy. Sent as
+            If-None-Match / If-Modified-Since so an unchanged dataset costs one 304.
+        session (requests.Session): Session to use (defaults to a pooled session
+            without adapter retries, so this function is the only retry layer).
+        max_attempts (int): Attempts before giving up on an interrupted stream
+            or a transient (429/5xx) status.
+        backoff (float): Base delay in seconds, doubled after each failed attempt.
+            A Retry-After header on 429/503 takes precedence.
+        stall_timeout (float): Give up once no bytes have arrived for this many
+            seconds, across attempts. A slow transfer that keeps making
+            progress is never cut off.
+        deadline (float): Optional overall time budget in seconds across all
+            attempts (None: no cap). Only worth setting when a cached copy can
+            be served instead.
+
+    Returns:
+        requests.structures.CaseInsensitiveDict or None: Response headers of the
+        completed download, or None if the server answered 304 Not Modified.
+    """
+    session = session or get_download_session()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial_meta = dest.with_name(dest.name + ".json")
+    started = last_progress = time.monotonic()
+
+    def remaining() -> float:
+        now = time.monotonic()
+        left = stall_timeout - (now - last_progress)
+        if left <= 0:
+            raise TimeoutError(f"❌ Download of {url} stalled: no data for {stall_timeout:.0f}s.")
+        if deadline is not None:
+            if now - started >= deadline:
+                raise TimeoutError(f"❌ Download of {url} exceeded its {deadline:.0f}s deadline.")
+            left = min(left, deadline - (now - started))
+        return left
+
+    for attempt in range(1, max_attempts + 1):
+        # Byte offsets must refer to the raw body, so ask for no compression.
+        headers = {"Accept-Encoding": "identity"}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        resume_from = dest.stat().st_size if dest.exists() else 0
+        resume_validator = load_validators(partial_meta)
+        if resume_from and resume_validator:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = resume_validator.get("etag") or resume_validator.get("last_modified")
+
+        retry_after = None
+        try:
+            left = remaining()
+            timeout = (min(REQUEST_TIMEOUT[0], left), min(REQUEST_TIMEOUT[1], left))
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 304:
+                    return None
+
+                if response.status_code == 416:
+                    logger.warning("⚠️ Partial download no longer valid — restarting from scratch.")
+                    dest.unlink(missing_ok=True)
+                    partial_meta.unlink(missing_ok=True)
+                    continue
+
+                if response.status_code in RETRY_STATUSES:
+                    retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                    raise requests.ConnectionError(f"HTTP {response.status_code} from {url}")
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    start = content_range_start(response.headers.get("Content-Range"))
+                    if start != resume_from:
+                        logger.warning(f"⚠️ Server resumed at byte {start} instead of {resume_from:,} "
+                                       f"— restarting from scratch.")
+                        dest.unlink(missing_ok=True)
+                        partial_meta.unlink(missing_ok=True)
+                        continue
+                    logger.info(f"⏯️ Resuming download at byte {resume_from:,}.")
+                    mode = "ab"
+                else:
+                    mode = "wb"
+                    save_validators(partial_meta, response.headers)
+
+                with open(dest, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        last_progress = time.monotonic()
+                        remaining()
+
+                partial_meta.unlink(missing_ok=True)
+                return response.headers
+
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == max_attempts:
+                raise
+            delay = retry_after if retry_after is not None else backoff * 2 ** (attempt - 1)
+            delay = min(delay, remaining())
+            logger.warning(f"🔁 Download interrupted ({e}); retrying in {delay:.0f}s "
+                           f"(attempt {attempt}/{max_attempts}).")
+            time.sleep(delay)
+
+    raise RuntimeError(f"❌ Download of {url} did not complete after {max_attempts} attempts.")
+
+
+# -------------------------
+# Helper: Parse Raw CSV Export
+# -------------------------
+def read_csv_export(path: Path) -> pd.DataFrame:
+    return standardize_export(pd.read_csv(path, encoding='utf-8-sig'))
+
+
+def standardize_export(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.upper()
+
+    # Fix potential BOM header issue
+    if 'Ï»¿DATE' in df.columns:
+        df.rename(columns={'Ï»¿DATE': 'DATE'}, inplace=True)
+
+    logger.info(f"📌 Loaded {len(df)} rows with columns: {list(df.columns)}")
+
+    required_cols = {"DATE", "PORTNAME"}
+    if not required_cols.issubset(df.columns):
+        raise KeyError(f"❌ Missing required columns: {required_cols - set(df.columns)}")
+
+    # Standardize and clean
+    df["DATE"] = pd.to_datetime(df["DATE"], errors="coerce")
+    df.rename(columns={"PORTNAME": "PORT"}, inplace=True)
+
+    # Derive TRAFFIC if not present
+    if "TRAFFIC" not in df.columns:
+        import_total = pd.to_numeric(df.get("IMPORT", 0), errors="coerce").fillna(0)
+        export_total = pd.to_numeric(df.get("EXPORT", 0), errors="coerce").fillna(0)
+        df["TRAFFIC"] = import_total + export_total
+        logger.info("➕ Derived TRAFFIC from IMPORT + EXPORT.")
+
+    # Drop rows missing core fields
+    df.dropna(subset=["DATE", "PORT"], inplace=True)
+    return df
+
+
 # -------------------------
 # Fetch and Preserve All CSV Data
 # -------------------------
 def fetch_from_arcgis_api(
         cache: bool = True,
         return_metadata: bool = False,
-        sample_fraction: float = None
+        sample_fraction: float = None,
+        url: str = CSV_URL,
+        session: requests.Session = None,
+        cache_path: Path = None,
+        partial_path: Path = None,
+        deadline: float = DOWNLOAD_DEADLINE_SECONDS
 ) -> pd.DataFrame:
     """
     Fetches port traffic data from ArcGIS Open Data portal with optional caching and sampling.
@@ -45,59 +331,61 @@ def fetch_from_arcgis_api(
         cache (bool): Use local cache if available and fresh.
         return_metadata (bool): Return metadata along with DataFrame.
         sample_fraction (float): Optional fraction of rows to randomly sample (e.g., 0.15 for 15%).
+        url (str): CSV export URL (override to point at a local stand-in).
+        session (requests.Session): Optional session; defaults to a pooled session.
+        cache_path (Path): CSV cache location (defaults to CACHE_PATH). Its ETag /
+            Last-Modified are kept next to it in `<name>.meta.json`.
+        partial_path (Path): In-progress download file (defaults to PARTIAL_PATH).
+        deadline (float): Time budget in seconds for the download when a cached
+            copy exists to fall back to (None: no cap). Without a cache the
+            download runs until it completes or stalls.
 
     Returns:
         pd.DataFrame or (pd.DataFrame, dict): Cleaned DataFrame and optional metadata.
     """
-    if cache and is_cache_fresh(CACHE_PATH, CACHE_TTL_SECONDS):
+    cache_path = Path(cache_path) if cache_path is not None else CACHE_PATH
+    cache_meta_path = cache_path.with_suffix(".meta.json")
+    partial_path = Path(partial_path) if partial_path is not None else PARTIAL_PATH
+
+    if cache and is_cache_fresh(cache_path, CACHE_TTL_SECONDS):
         logger.info("✅ Using cached PortWatch CSV data.")
-        df = pd.read_csv(CACHE_PATH, parse_dates=["DATE"])
+        df = pd.read_csv(cache_path, parse_dates=["DATE"])
     else:
         logger.info("📥 Downloading CSV from ArcGIS Open Data portal...")
         try:
-            response = requests.get(CSV_URL, timeout=60)
-            response.raise_for_status()
+            has_fallback = cache_path.exists()
+            validators = load_validators(cache_meta_path) if cache and has_fallback else {}
+            headers = download_csv(url, dest=partial_path, validators=validators, session=session,
+                                   deadline=deadline if has_fallback else None)
 
-            df = pd.read_csv(StringIO(response.text), encoding='utf-8-sig')
-            df.columns = df.columns.str.upper()
-
-            # Fix potential BOM header issue
-            if 'Ï»¿DATE' in df.columns:
-                df.rename(columns={'Ï»¿DATE': 'DATE'}, inplace=True)
-
-            logger.info(f"📌 Loaded {len(df)} rows with columns: {list(df.columns)}")
-
-            required_cols = {"DATE", "PORTNAME"}
-            if not required_cols.issubset(df.columns):
-                raise KeyError(f"❌ Missing required columns: {required_cols - set(df.columns)}")
-
-            # Standardize and clean
-            df["DATE"] = pd.to_datetime(df["DATE"], errors="coerce")
-            df.rename(columns={"PORTNAME": "PORT"}, inplace=True)
-
-            # Derive TRAFFIC if not present
-            if "TRAFFIC" not in df.columns:
-                import_total = pd.to_numeric(df.get("IMPORT", 0), errors="coerce").fillna(0)
-                export_total = pd.to_numeric(df.get("EXPORT", 0), errors="coerce").fillna(0)
-                df["TRAFFIC"] = import_total + export_total
-                logger.info("➕ Derived TRAFFIC from IMPORT + EXPORT.")
+            if headers is None:
+                # 304 Not Modified: the cached copy is current, restart its TTL.
+                logger.info("✅ Upstream unchanged (304) — reusing cached PortWatch CSV data.")
+                cache_path.touch()
+                df = pd.read_csv(cache_path, parse_dates=["DATE"])
+            else:
+                df = read_csv_export(partial_path)
 
-            # Drop rows missing core fields
-            df.dropna(subset=["DATE", "PORT"], inplace=True)
+                if cache:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    df.to_csv(cache_path, index=False)
+                    save_validators(cache_meta_path, headers)
+                    logger.info(f"💾 Cached full CSV data to {cache_path.resolve()}")
 
-            if cache:
-                CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-                df.to_csv(CACHE_PATH, index=False)
-                logger.info(f"💾 Cached full CSV data to {CACHE_PATH.resolve()}")
+                partial_path.unlink(missing_ok=True)
 
         except Exception as e:
             logger.error(f"❌ Failed to download/process CSV: {e}")
-            if CACHE_PATH.exists():
+            if cache_path.exists():
                 logger.warning("🔁 Falling back to last known cached version.")
-                df = pd.read_csv(CACHE_PATH, parse_dates=["DATE"])
+                df = pd.read_csv(cache_path, parse_dates=["DATE"])
             else:
                 raise RuntimeError("❌ No valid data available from URL or cache.")
 
+    return finalize_frame(df, sample_fraction=sample_fraction, return_metadata=return_metadata)
+
+
+def finalize_frame(df: pd.DataFrame, sample_fraction: float = None, return_metadata: bool = False):
     # Optional sampling
     if sample_fraction is not None:
         if 0 < sample_fraction < 1:
@@ -114,3 +402,312 @@ def fetch_from_arcgis_api(
         return df, metadata
 
     return df
+
+
+# -------------------------
+# Parallel Partitioned Ingestion (Feature Service)
+# -------------------------
+def query_feature_count(url: str = FEATURE_SERVICE_URL, session: requests.Session = None,
+                        where: str = "1=1") -> int:
+    session = session or get_session()
+    response = session.get(url, params={"where": where, "returnCountOnly": "true", "f": "json"},
+                           timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    payload = response.json()
+    if "error" in payload:
+        raise RuntimeError(f"❌ Feature service error: {payload['error']}")
+    return int(payload["count"])
+
+
+def query_layer_info(url: str = FEATURE_SERVICE_URL, session: requests.Session = None) -> dict:
+    """
+    Returns the layer metadata (maxRecordCount, editingInfo.lastEditDate,
+    fields, ...) read from the layer endpoint next to `url`, or an empty dict
+    when it cannot be read.
+    """
+    session = session or get_session()
+    layer_url = url[:-len("/query")] if url.rstrip("/").endswith("/query") else url
+    try:
+        response = session.get(layer_url, params={"f": "json"}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        info = response.json()
+        if "error" in info:
+            raise ValueError(info["error"])
+        return info
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"⚠️ Could not read layer metadata: {e}")
+        return {}
+
+
+def effective_page_size(page_size: int, info: dict) -> int:
+    """Caps `page_size` to the layer's maxRecordCount, which the server enforces silently."""
+    max_record_count = info.get("maxRecordCount")
+    if max_record_count and max_record_count < page_size:
+        logger.info(f"📏 Layer caps pages at {max_record_count} records — using that instead of {page_size}.")
+        return int(max_record_count)
+    return page_size
+
+
+def fetch_partition(url: str, offset: int, limit: int, session: requests.Session = None,
+                    where: str = "1=1") -> pd.DataFrame:
+    """
+    Fetches one page of the feature service query API as a DataFrame.
+    Date fields (epoch milliseconds in JSON) are converted to datetimes.
+    """
+    session = session or get_session()
+    params = {
+        "where": where,
+        "outFields": "*",
+        "orderByFields": "ObjectId",
+        "resultOffset": offset,
+        "resultRecordCount": limit,
+        "returnGeometry": "false",
+        "f": "json"
+    }
+    response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    payload = response.json()
+    if "error" in payload:
+        raise RuntimeError(f"❌ Feature service error at offset {offset}: {payload['error']}")
+
+    df = pd.DataFrame([feature["attributes"] for feature in payload.get("features", [])])
+    date_fields = [f["name"] for f in payload.get("fields", []) if f.get("type") == "esriFieldTypeDate"]
+    for col in date_fields:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], unit="ms", errors="coerce")
+    return df
+
+
+def fetch_records(url: str, offset: int, limit: int, expected: int = None,
+                  session: requests.Session = None, where: str = "1=1") -> pd.DataFrame:
+    """
+    Fetches `limit` records starting at `offset`, re-paging from where the
+    previous page stopped when the server returns fewer rows than asked for.
+
+    Raises:
+        RuntimeError: If fewer than `expected` rows (default: `limit`) could be
+            fetched, so a short result is never mistaken for a complete one.
+    """
+    expected = limit if expected is None else expected
+    pages, fetched = [], 0
+    while fetched < limit:
+        page = fetch_partition(url, offset + fetched, limit - fetched, session=session, where=where)
+        if page.empty:
+            break
+        pages.append(page)
+        fetched += len(page)
+
+    if fetched < expected:
+        raise RuntimeError(f"❌ Short page at offset {offset}: got {fetched} of {expected} records.")
+    return pd.concat(pages, ignore_index=True)
+
+
+# -------------------------
+# Port Locations
+# -------------------------
+def fetch_port_locations(
+        cache: bool = True,
+        url: str = PORTS_URL,
+        session: requests.Session = None,
+        cache_path: Path = None,
+        page_size: int = PAGE_SIZE
+) -> pd.DataFrame:
+    """
+    Fetches port coordinates from the PortWatch ports layer, to be joined onto
+    the traffic data by PORT_ID.
+
+    The map is optional, so failures never raise: the last cached table is
+    used, or an empty one when there is none.
+
+    Args:
+        cache (bool): Use local cache if available and fresh.
+        url (str): Ports layer query endpoint (override to point at a local stand-in).
+        session (requests.Session): Optional session; defaults to a pooled session.
+        cache_path (Path): CSV cache location (defaults to PORT_LOCATIONS_PATH).
+        page_size (int): Records per request (capped at the layer's maxRecordCount).
+
+    Returns:
+        pd.DataFrame: One row per port with PORT_ID, LAT and LON.
+    """
+    cache_path = Path(cache_path) if cache_path is not None else PORT_LOCATIONS_PATH
+    if cache and is_cache_fresh(cache_path, PORT_LOCATIONS_TTL_SECONDS):
+        logger.info("✅ Using cached port locations.")
+        return pd.read_csv(cache_path, dtype={"PORT_ID": str})
+
+    logger.info("📥 Fetching port locations from the PortWatch ports layer...")
+    try:
+        count = query_feature_count(url, session=session)
+        page_size = effective_page_size(page_size, query_layer_info(url, session=session))
+        # fetch_records raises on a short page, so missing ports fall back to
+        # the cache instead of silently vanishing from the map.
+        pages = [fetch_records(url, offset, page_size, expected=min(page_size, count - offset), session=session)
+                 for offset in range(0, count, page_size)]
+        df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame(columns=["PORTID", "LAT", "LON"])
+        df.columns = df.columns.str.upper()
+        df = df.rename(columns={"PORTID": "PORT_ID", "LATITUDE": "LAT", "LONGITUDE": "LON"})
+        df = df[["PORT_ID", "LAT", "LON"]].dropna().drop_duplicates("PORT_ID")
+        df["PORT_ID"] = df["PORT_ID"].astype(str)
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch port locations: {e}")
+        if cache_path.exists():
+            logger.warning("🔁 Falling back to last known port locations.")
+            return pd.read_csv(cache_path, dtype={"PORT_ID": str})
+        return pd.DataFrame(columns=["PORT_ID", "LAT", "LON"])
+
+    if cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(cache_path, index=False)
+        logger.info(f"💾 Cached {len(df)} port locations to {cache_path.resolve()}")
+    return df
+
+
+def _partition_dir(cache_dir: Path, offset: int) -> Path:
+    return cache_dir / f"part-{offset:010d}"
+
+
+def _manifest_path(cache_dir: Path) -> Path:
+    return cache_dir / "manifest.json"
+
+
+def _prepare_partition_cache(cache_dir: Path, key: dict, ttl: int) -> bool:
+    """
+    Decides what to keep from a previous run.
+
+    `key` identifies the result set (count, page size and the layer's
+    lastEditDate). A completed run is reused as-is only while its key matches
+    and it is younger than `ttl` (the TTL is skipped when lastEditDate is
+    known, since that already tracks upstream revisions). An interrupted run
+    with the same key keeps its finished partitions. Anything else is wiped.
+
+    Returns:
+        bool: True if the cache holds a complete, current result set.
+    """
+    manifest_path = _manifest_path(cache_dir)
+    existing = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    same_key = {k: existing.get(k) for k in key} == key
+    completed_at = existing.get("completed_at")
+
+    if same_key and completed_at is not None:
+        if key.get("last_edit_date") is not None or time.time() - completed_at < ttl:
+            return True
+        logger.info("⌛ Partition cache expired — refetching.")
+    elif same_key:
+        logger.info("⏯️ Resuming interrupted partitioned download.")
+        return False
+
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(key))
+    return False
+
+
+def _mark_partition_cache_complete(cache_dir: Path, key: dict) -> None:
+    _manifest_path(cache_dir).write_text(json.dumps({**key, "completed_at": time.time()}))
+
+
+def fetch_from_feature_service(
+        url: str = FEATURE_SERVICE_URL,
+        page_size: int = PAGE_SIZE,
+        max_workers: int = MAX_WORKERS,
+        cache_dir: Path = PARTITION_CACHE_DIR,
+        max_attempts: int = MAX_PARTITION_ATTEMPTS,
+        return_metadata: bool = False,
+        sample_fraction: float = None,
+        session: requests.Session = None,
+        ttl: int = CACHE_TTL_SECONDS,
+        where: str = "1=1"
+) -> pd.DataFrame:
+    """
+    Loads port traffic data by paging through the ArcGIS feature service
+    query API in parallel, as an alternative to the single-stream CSV export.
+
+    The result set is split into offset/limit partitions fetched on a bounded
+    thread pool. Each partition is written to the columnar cache as soon as it
+    arrives. A completed cache is served while current (same lastEditDate, or
+    within `ttl` when the layer does not report one); otherwise only
+    partitions left by an interrupted run of the same result set are reused,
+    and only failed partitions are retried. Pages are capped at the layer's
+    maxRecordCount, and a partition that comes back short is re-paged or
+    fails, so rows are never skipped silently.
+
+    Args:
+        url (str): Feature layer query endpoint.
+        page_size (int): Records per partition (capped at the layer's maxRecordCount).
+        max_workers (int): Maximum number of concurrent requests.
+        cache_dir (Path): Directory holding one columnar partition per page.
+        max_attempts (int): Rounds of retries for failed partitions.
+        return_metadata (bool): Return metadata along with DataFrame.
+        sample_fraction (float): Optional fraction of rows to randomly sample.
+        session (requests.Session): Optional session; defaults to a pooled session sized to `max_workers`.
+        ttl (int): Maximum age in seconds of a completed cache when lastEditDate is unavailable.
+        where (str): Attribute filter passed to the query API.
+
+    Returns:
+        pd.DataFrame or (pd.DataFrame, dict): Cleaned DataFrame and optional metadata.
+    """
+    # No adapter retries: failed partitions are retried in rounds below.
+    session = session or build_session(retries=0, pool_size=max_workers)
+    cache_dir = Path(cache_dir)
+
+    count = query_feature_count(url, session=session, where=where)
+    info = query_layer_info(url, session=session)
+    page_size = effective_page_size(page_size, info)
+    key = {
+        "url": url,
+        "where": where,
+        "count": count,
+        "page_size": page_size,
+        "last_edit_date": info.get("editingInfo", {}).get("lastEditDate")
+    }
+    if _prepare_partition_cache(cache_dir, key, ttl):
+        logger.info("✅ Using cached PortWatch feature service partitions.")
+        offsets = []
+    else:
+        offsets = [o for o in range(0, count, page_size) if not _partition_dir(cache_dir, o).exists()]
+        logger.info(f"📥 Fetching {count:,} records in {len(offsets)} partitions "
+                    f"({max_workers} workers, {page_size} per page)...")
+
+    def load(offset: int) -> int:
+        df = fetch_records(url, offset, page_size, expected=min(page_size, count - offset),
+                           session=session, where=where)
+        # Write to a temporary name first so a crash never leaves a half-written partition.
+        staging = cache_dir / f".tmp-{offset:010d}"
+        shutil.rmtree(staging, ignore_errors=True)
+        write_columnar(df, staging)
+        staging.rename(_partition_dir(cache_dir, offset))
+        return len(df)
+
+    for attempt in range(1, max_attempts + 1):
+        if not offsets:
+            break
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(load, offset): offset for offset in offsets}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Partition at offset {futures[future]} failed: {e}")
+                    failed.append(futures[future])
+        offsets = sorted(failed)
+        if offsets and attempt < max_attempts:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            logger.info(f"🔁 Retrying {len(offsets)} failed partitions in {delay:.0f}s "
+                        f"(attempt {attempt + 1}/{max_attempts}).")
+            time.sleep(delay)
+
+    if offsets:
+        raise RuntimeError(f"❌ {len(offsets)} partitions failed after {max_attempts} attempts: {offsets}")
+    _mark_partition_cache_complete(cache_dir, key)
+
+    parts = sorted(p for p in cache_dir.iterdir() if p.is_dir() and p.name.startswith("part-"))
+    if parts:
+        df = pd.concat([to_private_frame(attach_columnar(p)) for p in parts], ignore_index=True)
+    else:
+        # Empty result set: keep the layer's columns so downstream code sees the usual frame.
+        df = pd.DataFrame(columns=[f["name"] for f in info.get("fields", [])] or ["DATE", "PORTNAME"])
+    df = standardize_export(df)
+    logger.info(f"💾 Loaded {len(parts)} partitions from {cache_dir.resolve()}")
+
+    return finalize_frame(df, sample_fraction=sample_fraction, return_metadata=return_metadata)
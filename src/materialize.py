@@ -0,0 +1,274 @@
+import argparse
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from src.columnar import attach_columnar, to_private_frame, unmapped_columns, write_columnar
+from src.data_loader import fetch_from_arcgis_api, fetch_port_locations
+from src.preprocess import clean_and_engineer
+from src.analytics import (
+    compute_kpi_values,
+    detect_anomalies,
+    forecast_metric,
+    get_country_shares,
+    get_top_ports
+)
+
+# -------------------------
+# Configuration
+# -------------------------
+SNAPSHOT_ROOT = Path("data/snapshots")
+CURRENT_POINTER = "CURRENT"
+ENGINEERED_DIR = "engineered"
+ARTIFACTS_FILE = "artifacts.pkl"
+MANIFEST_FILE = "manifest.json"
+KEEP_SNAPSHOTS = 3
+DEFAULT_WINDOW_YEARS = 2
+DEFAULT_SAMPLE_FRACTION = 0.05  # Shared with the app's in-process fallback
+METRICS = ["TRAFFIC", "TOTAL_IMPORT", "TOTAL_EXPORT", "TOTAL_TRADE_VOLUME"]
+
+logger = logging.getLogger("portwatch_materializer")
+
+
+# -------------------------
+# Helper: Default Dashboard Window
+# -------------------------
+def default_window(df: pd.DataFrame, years: int = DEFAULT_WINDOW_YEARS) -> tuple:
+    end = df["DATE"].max()
+    return end - pd.DateOffset(years=years), end
+
+
+# -------------------------
+# Derived Artifacts
+# -------------------------
+def anomaly_column(metric: str) -> str:
+    return f"ANOMALY_{metric}"
+
+
+def flag_default_anomalies(df: pd.DataFrame, years: int = DEFAULT_WINDOW_YEARS) -> pd.DataFrame:
+    """
+    Adds one ANOMALY_<METRIC> column per metric, flagged over the default
+    dashboard window (rows outside the window are never anomalous).
+    """
+    df = df.copy()
+    start, end = default_window(df, years=years)
+    in_window = (df["DATE"] >= start) & (df["DATE"] <= end)
+
+    for metric in METRICS:
+        if metric not in df.columns:
+            continue
+        flagged = detect_anomalies(df[in_window], metric=metric)
+        df[anomaly_column(metric)] = False
+        df.loc[in_window, anomaly_column(metric)] = flagged["ANOMALY"]
+
+    return df
+
+
+def build_artifacts(df: pd.DataFrame, years: int = DEFAULT_WINDOW_YEARS) -> dict:
+    """
+    Computes every derived artifact served by the dashboard's default view
+    (all ports, last `years` years), keyed by metric. Expects the frame
+    returned by `flag_default_anomalies`.
+    """
+    start, end = default_window(df, years=years)
+    window = df[(df["DATE"] >= start) & (df["DATE"] <= end)]
+
+    artifacts = {}
+    for metric in METRICS:
+        if metric not in window.columns:
+            logger.warning(f"⚠️ Skipping metric {metric} — column not found.")
+            continue
+
+        artifacts[metric] = {
+            "kpis": compute_kpi_values(window.assign(ANOMALY=window[anomaly_column(metric)]), metric=metric),
+            "top_ports": get_top_ports(window, metric=metric),
+            "country_shares": get_country_shares(window, metric=metric) if "COUNTRY" in window.columns else None,
+            "forecast": forecast_metric(window, metric=metric)
+        }
+        logger.info(f"🧮 Materialized artifacts for {metric}.")
+
+    return artifacts
+
+
+# -------------------------
+# Snapshot Writer
+# -------------------------
+def write_snapshot(df: pd.DataFrame, root: Path = SNAPSHOT_ROOT,
+                   years: int = DEFAULT_WINDOW_YEARS, keep: int = KEEP_SNAPSHOTS,
+                   sample_fraction: float = None) -> Path:
+    """
+    Writes a versioned snapshot directory under `root` and atomically points
+    `root/CURRENT` at it.
+
+    The snapshot is assembled in a hidden staging directory and renamed into
+    place, so readers only ever see complete snapshots. The pointer file is
+    swapped with `os.replace`, which is atomic on POSIX and Windows.
+    `sample_fraction` is only recorded in the manifest.
+
+    Returns:
+        Path: Directory of the published snapshot.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    staging = root / f".staging-{version}"
+    staging.mkdir()
+
+    try:
+        start, end = default_window(df, years=years)
+        df = flag_default_anomalies(df, years=years)
+        write_columnar(df.reset_index(drop=True), staging / ENGINEERED_DIR)
+        with open(staging / ARTIFACTS_FILE, "wb") as f:
+            pickle.dump(build_artifacts(df, years=years), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        manifest = {
+            "version": version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "record_count": len(df),
+            "sample_fraction": sample_fraction,
+            "min_date": df["DATE"].min().isoformat(),
+            "max_date": df["DATE"].max().isoformat(),
+            "default_start": start.isoformat(),
+            "default_end": end.isoformat()
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+        target = root / version
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer_tmp = root / f".{CURRENT_POINTER}.tmp"
+    pointer_tmp.write_text(version)
+    os.replace(pointer_tmp, root / CURRENT_POINTER)
+    logger.info(f"📦 Published snapshot {version} to {target.resolve()}")
+
+    prune_snapshots(root, keep=keep)
+    return target
+
+
+def prune_snapshots(root: Path = SNAPSHOT_ROOT, keep: int = KEEP_SNAPSHOTS) -> None:
+    root = Path(root)
+    current = read_current_version(root)
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for path in versions[:-keep] if keep > 0 else []:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"🧹 Removed old snapshot {path.name}")
+
+
+# -------------------------
+# Snapshot Reader
+# -------------------------
+def read_current_version(root: Path = SNAPSHOT_ROOT) -> str:
+    pointer = Path(root) / CURRENT_POINTER
+    return pointer.read_text().strip() if pointer.exists() else None
+
+
+class Snapshot:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST_FILE).read_text())
+        self.version = self.manifest["version"]
+        self.default_start = pd.Timestamp(self.manifest["default_start"])
+        self.default_end = pd.Timestamp(self.manifest["default_end"])
+        # Memory-mapped and read-only: every worker attaching to this snapshot
+        # shares the same pages instead of holding its own copy.
+        self.data = attach_columnar(self.path / ENGINEERED_DIR)
+        copied = unmapped_columns(self.data)
+        if copied:
+            logger.warning(f"⚠️ Snapshot {self.version}: columns held in private memory, "
+                           f"not shared across workers: {copied}")
+        with open(self.path / ARTIFACTS_FILE, "rb") as f:
+            self.artifacts = pickle.load(f)
+
+    def is_default_view(self, port, start_date, end_date) -> bool:
+        if port or start_date is None or end_date is None:
+            return False
+        return (pd.Timestamp(start_date) == self.default_start and
+                pd.Timestamp(end_date) == self.default_end)
+
+    def lookup(self, metric: str, artifact: str):
+        return self.artifacts.get(metric, {}).get(artifact)
+
+    def default_view(self, metric: str, columns: list = None) -> pd.DataFrame:
+        """
+        Default-window rows with the precomputed ANOMALY flags for `metric`.
+        Only `columns` (default: all UI columns) are copied out of the mapping.
+        """
+        rows = (self.data["DATE"] >= self.default_start) & (self.data["DATE"] <= self.default_end)
+        columns = list(columns) if columns is not None else self.ui_columns(self.data)
+        flag = anomaly_column(metric)
+        if flag in self.data.columns:
+            df = to_private_frame(self.data, rows=rows, columns=columns + [flag])
+            return df.rename(columns={flag: "ANOMALY"})
+        return to_private_frame(self.data, rows=rows, columns=columns).assign(ANOMALY=False)
+
+    @staticmethod
+    def ui_columns(df: pd.DataFrame) -> list:
+        """All columns except the per-metric anomaly flags."""
+        flags = {anomaly_column(m) for m in METRICS}
+        return [col for col in df.columns if col not in flags]
+
+
+class SnapshotStore:
+    """
+    Holds the snapshot currently served by this process and swaps in newer
+    ones when `root/CURRENT` changes. `refresh()` is cheap when nothing has
+    changed, so it can be called at the start of every request.
+    """
+
+    def __init__(self, root: Path = SNAPSHOT_ROOT):
+        self.root = Path(root)
+        self.current = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> Snapshot:
+        version = read_current_version(self.root)
+        if version is None or (self.current is not None and self.current.version == version):
+            return self.current
+
+        with self._lock:
+            if self.current is None or self.current.version != version:
+                try:
+                    self.current = Snapshot(self.root / version)
+                    logger.info(f"🔄 Loaded snapshot {version}")
+                except Exception as e:
+                    logger.error(f"❌ Failed to load snapshot {version}: {e}")
+        return self.current
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Materialize a ready-to-serve PortWatch dashboard snapshot.")
+    parser.add_argument("--root", type=Path, default=SNAPSHOT_ROOT, help="Snapshot directory root.")
+    parser.add_argument("--sample-fraction", type=float, default=DEFAULT_SAMPLE_FRACTION,
+                        help="Fraction of rows to sample (default matches the app's in-process fallback).")
+    parser.add_argument("--full", action="store_true", help="Keep every row instead of sampling.")
+    parser.add_argument("--years", type=int, default=DEFAULT_WINDOW_YEARS, help="Default dashboard window in years.")
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS, help="Number of snapshots to retain.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local CSV cache.")
+    args = parser.parse_args(argv)
+    sample_fraction = None if args.full else args.sample_fraction
+
+    # No deadline: a scheduled build should wait for a slow but progressing
+    # download rather than publish a stale cached copy.
+    raw = fetch_from_arcgis_api(cache=not args.no_cache, sample_fraction=sample_fraction, deadline=None)
+    locations = fetch_port_locations(cache=not args.no_cache)
+    engineered = clean_and_engineer(raw, locations=locations)
+    write_snapshot(engineered, root=args.root, years=args.years, keep=args.keep, sample_fraction=sample_fraction)
+
+
+if __name__ == "__main__":
+    main()
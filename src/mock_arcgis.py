@@ -0,0 +1,376 @@
+import argparse
+import csv
+import hashlib
+import json
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# -------------------------
+# Local stand-in for the ArcGIS endpoints used by src/data_loader.py.
+# Run with `python -m src.mock_arcgis` and point `url=` at it, or
+# `python -m src.mock_arcgis --benchmark` to measure ingestion throughput.
+# The tests under tests/ drive it in-process via `running_server`.
+# -------------------------
+LAYER_ROUTE = "/"
+CSV_ROUTE = "/csv"
+QUERY_ROUTE = "/query"
+PORTS_LAYER_ROUTE = "/ports"
+PORTS_QUERY_ROUTE = "/ports/query"
+
+
+# -------------------------
+# Synthetic Data
+# -------------------------
+def make_portwatch_csv(ports: int = 50, days: int = 365, seed: int = 42) -> bytes:
+    """Builds a CSV shaped like the PortWatch daily export (with a UTF-8 BOM)."""
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["date", "portid", "portname", "country", "portcalls", "portcalls_container",
+                     "import", "import_container", "export", "export_container"])
+    for p in range(ports):
+        for d in range(days):
+            writer.writerow([
+                (start + timedelta(days=d)).isoformat(), f"port{p}", f"Port {p}", f"Country {p % 12}",
+                rng.randint(0, 40), rng.randint(0, 20),
+                rng.randint(0, 90_000), rng.randint(0, 50_000), rng.randint(0, 90_000), rng.randint(0, 50_000)
+            ])
+    return ("\ufeff" + out.getvalue()).encode("utf-8")
+
+
+def make_port_locations(payload: bytes, seed: int = 42) -> tuple:
+    """Builds a ports layer (fields, attribute rows) with coordinates for every port in `payload`."""
+    rng = random.Random(seed)
+    rows = csv.DictReader(StringIO(payload.decode("utf-8-sig")))
+    ports = dict.fromkeys((row["portid"], row["portname"]) for row in rows)
+    fields = [{"name": "ObjectId", "type": "esriFieldTypeOID"},
+              {"name": "portid", "type": "esriFieldTypeString"},
+              {"name": "portname", "type": "esriFieldTypeString"},
+              {"name": "lat", "type": "esriFieldTypeDouble"},
+              {"name": "lon", "type": "esriFieldTypeDouble"}]
+    features = [{"ObjectId": i, "portid": portid, "portname": name,
+                 "lat": round(rng.uniform(-55, 70), 4), "lon": round(rng.uniform(-180, 180), 4)}
+                for i, (portid, name) in enumerate(ports, start=1)]
+    return fields, features
+
+
+def csv_to_features(payload: bytes) -> tuple:
+    """Converts a CSV payload into feature-service (fields, attribute rows) form."""
+    reader = csv.DictReader(StringIO(payload.decode("utf-8-sig")))
+    rows = list(reader)
+    fields = [{"name": "ObjectId", "type": "esriFieldTypeOID"}]
+    for name in reader.fieldnames or []:
+        fields.append({"name": name, "type": "esriFieldTypeDate" if name == "date" else
+                       "esriFieldTypeString" if name in ("portid", "portname", "country") else
+                       "esriFieldTypeInteger"})
+
+    features = []
+    for i, row in enumerate(rows, start=1):
+        attributes = {"ObjectId": i}
+        for field in fields[1:]:
+            value = row[field["name"]]
+            if field["type"] == "esriFieldTypeDate":
+                value = int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+            elif field["type"] == "esriFieldTypeInteger":
+                value = int(value)
+            attributes[field["name"]] = value
+        features.append(attributes)
+    return fields, features
+
+
+# -------------------------
+# Request Handler
+# -------------------------
+class MockArcGISHandler(BaseHTTPRequestHandler):
+    """
+    Serves `server.payload` at /csv with ETag / Last-Modified validators,
+    304 responses, single-range requests (If-Range aware) and optional
+    simulated connection drops after `server.fail_after_bytes` bytes for
+    the first `server.failures_remaining` responses, and an optional
+    `server.stall` (seconds) before the body is sent. The first
+    `server.throttled_remaining` requests are answered 429 with a
+    Retry-After of `server.retry_after` seconds. With
+    `server.honor_range_start` False, range requests are answered 206 from
+    byte 0, like a server that ignores the requested offset.
+
+    The same rows are exposed at /query in feature-service JSON form
+    (returnCountOnly, resultOffset/resultRecordCount), with an optional
+    per-request `server.latency`. Offsets in `server.failing_offsets`
+    ({offset: remaining failures}) answer like ArcGIS does on errors:
+    HTTP 200 with an {"error": ...} body. Layer metadata (editingInfo) is
+    served at /, and a ports layer with coordinates at /ports/query (metadata
+    at /ports).
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.request_log.append((self.path, dict(self.headers)))
+        route = self.path.split("?")[0]
+        if route == CSV_ROUTE:
+            self._serve_csv()
+        elif route == QUERY_ROUTE:
+            self._serve_query(self.server.fields, self.server.features)
+        elif route == PORTS_QUERY_ROUTE:
+            self._serve_query(self.server.port_fields, self.server.port_features)
+        elif route == PORTS_LAYER_ROUTE:
+            self._send_json(200, {"name": "PortWatch_ports_database", "maxRecordCount": self.server.max_record_count,
+                                  "fields": self.server.port_fields})
+        elif route == LAYER_ROUTE:
+            self._send_json(200, {"name": "Daily_Ports_Data", "maxRecordCount": self.server.max_record_count,
+                                  "editingInfo": {"lastEditDate": self.server.last_modified * 1000},
+                                  "fields": self.server.fields})
+        else:
+            self.send_error(404)
+
+    def _not_modified(self) -> bool:
+        etag = self.headers.get("If-None-Match")
+        if etag is not None:
+            return etag == self.server.etag
+        since = self.headers.get("If-Modified-Since")
+        if since is not None:
+            try:
+                return parsedate_to_datetime(since).timestamp() >= self.server.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _serve_csv(self):
+        payload = self.server.payload
+        if self._not_modified():
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            return
+
+        with self.server.lock:
+            throttle = self.server.throttled_remaining > 0
+            if throttle:
+                self.server.throttled_remaining -= 1
+        if throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", str(self.server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, status = 0, 200
+        requested = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        range_valid = if_range is None or if_range in (self.server.etag, self.server.last_modified_http)
+        if requested and requested.startswith("bytes=") and range_valid:
+            start = int(requested[len("bytes="):].split("-")[0])
+            if start >= len(payload):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(payload)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+            if not self.server.honor_range_start:
+                start = 0
+
+        body = payload[start:]
+        self.send_response(status)
+        self.send_header("Content-Type", "text/csv; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Last-Modified", self.server.last_modified_http)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+        self.end_headers()
+
+        if self.server.stall:
+            time.sleep(self.server.stall)
+
+        with self.server.lock:
+            drop = self.server.failures_remaining > 0
+            if drop:
+                self.server.failures_remaining -= 1
+        if drop:
+            self.wfile.write(body[:self.server.fail_after_bytes])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _serve_query(self, fields: list, features: list):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if params.get("returnCountOnly") == "true":
+            self._send_json(200, {"count": len(features)})
+            return
+
+        offset = int(params.get("resultOffset", 0))
+        limit = min(int(params.get("resultRecordCount", self.server.max_record_count)),
+                    self.server.max_record_count)
+        with self.server.lock:
+            fail = self.server.failing_offsets.get(offset, 0) > 0
+            if fail:
+                self.server.failing_offsets[offset] -= 1
+        if fail:
+            self._send_json(200, {"error": {"code": 500, "message": "Simulated failure", "details": []}})
+            return
+
+        page = features[offset:offset + limit]
+        self._send_json(200, {
+            "fields": fields,
+            "features": [{"attributes": attributes} for attributes in page],
+            "exceededTransferLimit": offset + limit < len(features)
+        })
+
+
+# -------------------------
+# Server
+# -------------------------
+class MockArcGISServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), payload: bytes = None,
+                 fail_after_bytes: int = 0, failures: int = 0, latency: float = 0.0,
+                 failing_offsets=(), max_record_count: int = 2000, stall: float = 0.0,
+                 throttled: int = 0, retry_after: int = 1, honor_range_start: bool = True):
+        super().__init__(address, MockArcGISHandler)
+        self.lock = threading.Lock()
+        self.request_log = []
+        self.fail_after_bytes = fail_after_bytes
+        self.failures_remaining = failures
+        self.latency = latency
+        self.stall = stall
+        self.throttled_remaining = throttled
+        self.retry_after = retry_after
+        self.honor_range_start = honor_range_start
+        # Iterable of offsets (fail once each) or {offset: number of failures}.
+        self.failing_offsets = (dict(failing_offsets) if isinstance(failing_offsets, dict)
+                                else {offset: 1 for offset in failing_offsets})
+        self.max_record_count = max_record_count
+        self.set_payload(payload if payload is not None else make_portwatch_csv())
+
+    def set_payload(self, payload: bytes, last_modified: float = None) -> None:
+        """Publishes a new dataset version (new ETag and Last-Modified)."""
+        self.payload = payload
+        self.etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        self.last_modified = int(last_modified if last_modified is not None else time.time())
+        self.last_modified_http = formatdate(self.last_modified, usegmt=True)
+        self.fields, self.features = csv_to_features(payload)
+        self.port_fields, self.port_features = make_port_locations(payload)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def csv_url(self) -> str:
+        return self.base_url + CSV_ROUTE
+
+    @property
+    def query_url(self) -> str:
+        return self.base_url + QUERY_ROUTE
+
+    @property
+    def ports_url(self) -> str:
+        return self.base_url + PORTS_QUERY_ROUTE
+
+
+@contextmanager
+def running_server(**kwargs):
+    """Runs a MockArcGISServer on a background thread for the duration of the block."""
+    server = MockArcGISServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# -------------------------
+# Benchmark: Throughput vs Concurrency
+# -------------------------
+def benchmark_feature_service(workers=(1, 2, 4, 8, 16), ports: int = 50, days: int = 365,
+                              page_size: int = 1000, latency: float = 0.05) -> list:
+    """
+    Times `fetch_from_feature_service` against a local server for each
+    concurrency level. Every run starts from an empty partition cache.
+
+    Returns:
+        list[dict]: One row per worker count with elapsed seconds and rows/s.
+    """
+    from src.data_loader import fetch_from_feature_service
+
+    results = []
+    with running_server(payload=make_portwatch_csv(ports, days), latency=latency,
+                        max_record_count=page_size) as server:
+        for n in workers:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                started = time.perf_counter()
+                df = fetch_from_feature_service(server.query_url, page_size=page_size,
+                                                max_workers=n, cache_dir=Path(cache_dir))
+                elapsed = time.perf_counter() - started
+            results.append({"workers": n, "rows": len(df), "seconds": round(elapsed, 3),
+                            "rows_per_second": round(len(df) / elapsed)})
+            print(f"workers={n:>3}  rows={len(df):,}  {elapsed:6.2f}s  {len(df) / elapsed:,.0f} rows/s")
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the ArcGIS PortWatch endpoints.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ports", type=int, default=50, help="Number of synthetic ports.")
+    parser.add_argument("--days", type=int, default=365, help="Number of synthetic days per port.")
+    parser.add_argument("--fail-after-bytes", type=int, default=0, help="Drop the connection after N bytes.")
+    parser.add_argument("--failures", type=int, default=0, help="Number of responses to drop.")
+    parser.add_argument("--latency", type=float, default=None,
+                        help="Seconds of latency per /query request (benchmark default: 0.05).")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Benchmark feature-service ingestion throughput against concurrency and exit.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Concurrency levels to benchmark.")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark_feature_service(workers=args.workers, ports=args.ports, days=args.days,
+                                  latency=0.05 if args.latency is None else args.latency)
+        return
+
+    server = MockArcGISServer(("127.0.0.1", args.port), make_portwatch_csv(args.ports, args.days),
+                              fail_after_bytes=args.fail_after_bytes, failures=args.failures,
+                              latency=args.latency or 0.0)
+    print(f"Serving mock ArcGIS CSV at {server.csv_url}, feature service at {server.query_url} "
+          f"and ports layer at {server.ports_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
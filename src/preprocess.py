@@ -1,7 +1,20 @@
 import pandas as pd
 import numpy as np
 
-def clean_and_engineer(df: pd.DataFrame) -> pd.DataFrame:
+def join_port_locations(df: pd.DataFrame, locations: pd.DataFrame) -> pd.DataFrame:
+    """Adds LAT/LON to every row by PORT_ID; ports without a location get NaN."""
+    if locations is None or locations.empty or "PORT_ID" not in df.columns:
+        return df
+    locations = locations[["PORT_ID", "LAT", "LON"]].drop_duplicates("PORT_ID")
+    locations = locations.assign(PORT_ID=locations["PORT_ID"].astype(str))
+    df = df.drop(columns=[col for col in ("LAT", "LON") if col in df.columns])
+    coords = df[["PORT_ID"]].astype(str).merge(locations, on="PORT_ID", how="left")
+    df["LAT"] = coords["LAT"].to_numpy()
+    df["LON"] = coords["LON"].to_numpy()
+    return df
+
+
+def clean_and_engineer(df: pd.DataFrame, locations: pd.DataFrame = None) -> pd.DataFrame:
     df = df.copy()
 
     # Normalize column names
@@ -15,7 +28,9 @@ def clean_and_engineer(df: pd.DataFrame) -> pd.DataFrame:
     df.rename(columns={
         "PORTNAME": "PORT",
         "COUNTRY": "COUNTRY",
-        "PORTID": "PORT_ID"
+        "PORTID": "PORT_ID",
+        "LATITUDE": "LAT",
+        "LONGITUDE": "LON"
     }, inplace=True)
 
     # Drop rows missing core fields
@@ -59,4 +74,7 @@ def clean_and_engineer(df: pd.DataFrame) -> pd.DataFrame:
         lambda x: (x - x.mean()) / x.std(ddof=0)
     ).clip(lower=-5, upper=5)
 
+    # Port coordinates for the map (PORT_ID -> LAT/LON)
+    df = join_port_locations(df, locations)
+
     return df
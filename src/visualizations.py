@@ -1,6 +1,6 @@
 import plotly.express as px
 import plotly.graph_objects as go
-from src.analytics import forecast_metric, get_top_ports
+from src.analytics import forecast_metric, get_top_ports, get_country_shares
 
 DEFAULT_HEIGHT = 500
 DEFAULT_MARGIN = dict(l=40, r=40, t=60, b=40)
@@ -57,8 +57,9 @@ def plot_traffic_time_series(df, metric='TRAFFIC', show_rolling_avg=True):
 # -------------------------
 # PROPHET FORECAST PLOT
 # -------------------------
-def plot_forecast(df, metric='TRAFFIC'):
-    forecast_df = forecast_metric(df, metric=metric)
+def plot_forecast(df, metric='TRAFFIC', forecast_df=None):
+    if forecast_df is None:
+        forecast_df = forecast_metric(df, metric=metric)
     if forecast_df.empty:
         return go.Figure().update_layout(title='Forecast (Insufficient data)', height=DEFAULT_HEIGHT)
 
@@ -99,11 +100,11 @@ def plot_forecast(df, metric='TRAFFIC'):
 # -------------------------
 # TOP N PORTS BAR CHART
 # -------------------------
-def plot_top_ports(df, metric='TRAFFIC', top_n=5):
-    if df.empty or metric not in df.columns:
-        return go.Figure().update_layout(title='Top Ports (No data available)', height=DEFAULT_HEIGHT)
-
-    top_df = get_top_ports(df, metric=metric, top_n=top_n)
+def plot_top_ports(df, metric='TRAFFIC', top_n=5, top_df=None):
+    if top_df is None:
+        if df.empty or metric not in df.columns:
+            return go.Figure().update_layout(title='Top Ports (No data available)', height=DEFAULT_HEIGHT)
+        top_df = get_top_ports(df, metric=metric, top_n=top_n)
     fig = px.bar(
         top_df,
         x='PORT',
@@ -164,11 +165,11 @@ def plot_import_export(df):
 # -------------------------
 # PIE CHART - TRAFFIC BY COUNTRY
 # -------------------------
-def plot_traffic_pie(df, metric='TRAFFIC'):
-    if df.empty or 'COUNTRY' not in df.columns or metric not in df.columns:
-        return go.Figure().update_layout(title='Pie Chart (Data unavailable)', height=DEFAULT_HEIGHT)
-
-    summary = df.groupby("COUNTRY")[metric].sum().sort_values(ascending=False).head(10)
+def plot_traffic_pie(df, metric='TRAFFIC', summary=None):
+    if summary is None:
+        if df.empty or 'COUNTRY' not in df.columns or metric not in df.columns:
+            return go.Figure().update_layout(title='Pie Chart (Data unavailable)', height=DEFAULT_HEIGHT)
+        summary = get_country_shares(df, metric=metric)
     fig = px.pie(
         names=summary.index,
         values=summary.values,
@@ -213,3 +214,45 @@ def plot_heatmap(df, metric='TRAFFIC'):
         template='plotly_white'
     )
     return fig
+
+
+# -------------------------
+# GLOBAL PORT MAP - SERVER-SIDE BINNED
+# -------------------------
+def plot_port_map(points, metric='TRAFFIC', zoom=0, center=None):
+    # An empty (but valid) frame means nothing is visible at this zoom: still render the map.
+    if points is None or metric not in points.columns:
+        return go.Figure().update_layout(title='Port Map (No location data available)', height=DEFAULT_HEIGHT)
+
+    metric_label = metric.replace("_", " ").title()
+    sizes = points[metric].astype(float).clip(lower=0) ** 0.5
+    sizes = 6 + 34 * sizes / sizes.max() if sizes.max() > 0 else sizes * 0 + 6
+
+    fig = go.Figure(go.Scattermap(
+        lat=points['LAT'],
+        lon=points['LON'],
+        mode='markers',
+        marker=dict(
+            size=sizes,
+            color=points[metric],
+            colorscale='Blues',
+            showscale=True,
+            colorbar=dict(title=metric_label),
+            sizemode='diameter'
+        ),
+        text=points['LABEL'],
+        customdata=points[['PORT_COUNT', metric]],
+        hovertemplate=f'%{{text}}<br>Ports=%{{customdata[0]}}<br>{metric_label}=%{{customdata[1]:,.0f}}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f'Global Port Map by {metric_label}',
+        map=dict(style='carto-positron', zoom=zoom, center=center or dict(lat=20, lon=0)),
+        height=DEFAULT_HEIGHT,
+        autosize=True,
+        width=None,
+        margin=DEFAULT_MARGIN,
+        uirevision=True,
+        template='plotly_white'
+    )
+    return fig
@@ -0,0 +1,15 @@
+import io
+
+import pandas as pd
+import pytest
+
+from src.data_loader import standardize_export
+from src.mock_arcgis import make_portwatch_csv
+from src.preprocess import clean_and_engineer
+
+
+@pytest.fixture(scope="session")
+def engineered():
+    """A small engineered frame built from the mock export, as the app would see it."""
+    raw = standardize_export(pd.read_csv(io.BytesIO(make_portwatch_csv(ports=5, days=120)), encoding="utf-8-sig"))
+    return clean_and_engineer(raw)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.columnar import attach_columnar, to_private_frame, unmapped_columns, write_columnar
+from src.materialize import ENGINEERED_DIR, Snapshot, write_snapshot
+
+
+def mixed_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "INT": np.arange(6, dtype="int64"),
+        "FLOAT": np.linspace(0, 1, 6),
+        "BOOL": [True, False] * 3,
+        "DATE": pd.date_range("2024-01-01", periods=6),
+        "OBJECT": pd.Series(["a", "b", None, "a", "c", "b"], dtype=object),
+        "STRING": pd.Series(["x", "y", "x", None, "z", "y"], dtype="string"),
+        "CATEGORY": pd.Categorical(["p", "q", "p", "q", "p", "q"]),
+        "NULLABLE": pd.array([1, None, 3, 4, None, 6], dtype="Int64"),
+        "NULLABLE_FULL": pd.array([1, 2, 3, 4, 5, 6], dtype="Int64")
+    })
+
+
+# -------------------------
+# Round-Trip
+# -------------------------
+def test_round_trip_preserves_values(tmp_path):
+    df = mixed_frame()
+    attached = attach_columnar(write_columnar(df, tmp_path))
+
+    assert list(attached.columns) == list(df.columns)
+    for col in df.columns:
+        expected = df[col].astype(object).where(df[col].notna(), None).tolist()
+        actual = attached[col].astype(object).where(attached[col].notna(), None).tolist()
+        assert actual == expected, col
+
+
+def test_attached_columns_stay_memory_mapped(tmp_path):
+    attached = attach_columnar(write_columnar(mixed_frame(), tmp_path))
+
+    assert unmapped_columns(attached) == []
+
+
+def test_attached_frame_is_read_only(tmp_path):
+    attached = attach_columnar(write_columnar(mixed_frame(), tmp_path))
+
+    with pytest.raises(ValueError):
+        attached["INT"].to_numpy()[0] = 99
+
+
+def test_tz_aware_dates_round_trip(tmp_path):
+    df = pd.DataFrame({"TS": pd.date_range("2024-03-30", periods=4, freq="12h", tz="Europe/Paris")})
+    attached = attach_columnar(write_columnar(df, tmp_path))
+
+    assert attached["TS"].dtype == df["TS"].dtype
+    assert attached["TS"].equals(df["TS"])
+    # Localizing copies this one column; it is reported rather than hidden.
+    assert unmapped_columns(attached) == ["TS"]
+
+
+def test_unsupported_extension_dtype_is_rejected(tmp_path):
+    df = pd.DataFrame({"SPAN": pd.arrays.IntervalArray.from_breaks([0, 1, 2])})
+
+    with pytest.raises(TypeError, match="Unsupported column dtype"):
+        write_columnar(df, tmp_path)
+
+
+# -------------------------
+# Private Copies
+# -------------------------
+def test_private_frame_copies_only_the_selection(tmp_path):
+    attached = attach_columnar(write_columnar(mixed_frame(), tmp_path))
+    rows = attached["INT"] >= 3
+
+    private = to_private_frame(attached, rows=rows, columns=["INT", "STRING"])
+
+    assert list(private.columns) == ["INT", "STRING"]
+    assert list(private["INT"]) == [3, 4, 5]
+    assert private["STRING"].dtype == object
+    assert unmapped_columns(private) == ["INT", "STRING"]
+    assert unmapped_columns(attached) == []
+
+
+def test_snapshot_data_is_fully_memory_mapped(tmp_path, engineered):
+    snapshot = Snapshot(write_snapshot(engineered, root=tmp_path))
+
+    assert unmapped_columns(snapshot.data) == []
+    assert len(snapshot.data) == len(engineered)
+    assert (snapshot.path / ENGINEERED_DIR).is_dir()
@@ -0,0 +1,160 @@
+import os
+import time
+
+import pytest
+
+from src.data_loader import (
+    content_range_start,
+    download_csv,
+    fetch_from_arcgis_api,
+    read_csv_export,
+    retry_after_seconds
+)
+from src.mock_arcgis import make_portwatch_csv, running_server
+
+PAYLOAD = make_portwatch_csv(ports=40, days=100)
+
+
+def range_headers(server) -> list:
+    return [headers.get("Range") for _, headers in server.request_log]
+
+
+# -------------------------
+# Resume
+# -------------------------
+def test_interrupted_download_resumes_byte_exact(tmp_path):
+    dest = tmp_path / "download.part"
+    with running_server(payload=PAYLOAD, fail_after_bytes=len(PAYLOAD) // 3, failures=2) as server:
+        headers = download_csv(server.csv_url, dest=dest, backoff=0.01)
+        ranges = range_headers(server)
+
+    assert headers["ETag"] == server.etag
+    assert dest.read_bytes() == PAYLOAD
+    assert ranges[0] is None
+    offsets = [int(r[len("bytes="):-1]) for r in ranges[1:]]
+    assert len(offsets) == 2 and 0 < offsets[0] < offsets[1] < len(PAYLOAD)
+
+
+def test_range_ignored_by_server_restarts_from_scratch(tmp_path):
+    dest = tmp_path / "download.part"
+    with running_server(payload=PAYLOAD, fail_after_bytes=len(PAYLOAD) // 3, failures=1,
+                        honor_range_start=False) as server:
+        download_csv(server.csv_url, dest=dest, backoff=0.01)
+        ranges = range_headers(server)
+
+    # Drop, mismatched 206 discarded, then a clean full download.
+    assert dest.read_bytes() == PAYLOAD
+    assert ranges[1] is not None and ranges[2] is None
+
+
+def test_changed_upstream_does_not_resume_stale_partial(tmp_path):
+    dest = tmp_path / "download.part"
+    with running_server(payload=PAYLOAD, fail_after_bytes=len(PAYLOAD) // 3, failures=1) as server:
+        with pytest.raises(Exception):
+            download_csv(server.csv_url, dest=dest, max_attempts=1)
+        changed = make_portwatch_csv(ports=41, days=100)
+        server.set_payload(changed)
+        download_csv(server.csv_url, dest=dest, backoff=0.01)
+
+    # If-Range no longer matches, so the server sends the full new body.
+    assert dest.read_bytes() == changed
+
+
+# -------------------------
+# Retry-After / Stalls / Deadline
+# -------------------------
+def test_429_waits_for_retry_after(tmp_path):
+    dest = tmp_path / "download.part"
+    with running_server(payload=PAYLOAD, throttled=1, retry_after=1) as server:
+        started = time.monotonic()
+        download_csv(server.csv_url, dest=dest, backoff=0.01)
+        elapsed = time.monotonic() - started
+
+    assert dest.read_bytes() == PAYLOAD
+    assert elapsed >= 1
+
+
+def test_stalled_upstream_gives_up(tmp_path):
+    with running_server(payload=PAYLOAD, stall=5) as server:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            download_csv(server.csv_url, dest=tmp_path / "stalled.part", backoff=0.01, stall_timeout=1)
+        assert time.monotonic() - started < 3
+
+
+def test_cold_start_ignores_deadline(tmp_path):
+    paths = dict(cache_path=tmp_path / "cache.csv", partial_path=tmp_path / "download.part")
+    with running_server(payload=PAYLOAD) as server:
+        df = fetch_from_arcgis_api(url=server.csv_url, deadline=1e-9, **paths)
+
+    assert len(df) == 40 * 100
+
+
+def test_deadline_falls_back_to_cached_copy(tmp_path):
+    cache_path = tmp_path / "cache.csv"
+    paths = dict(cache_path=cache_path, partial_path=tmp_path / "download.part")
+    with running_server(payload=PAYLOAD) as server:
+        fetch_from_arcgis_api(url=server.csv_url, **paths)
+        server.set_payload(make_portwatch_csv(ports=41, days=100))
+        os.utime(cache_path, (0, 0))
+        df = fetch_from_arcgis_api(url=server.csv_url, deadline=1e-9, **paths)
+
+    assert len(df) == 40 * 100
+
+
+# -------------------------
+# Cache Validators
+# -------------------------
+def test_expired_cache_revalidates_with_304(tmp_path):
+    cache_path, partial_path = tmp_path / "cache.csv", tmp_path / "download.part"
+    paths = dict(cache_path=cache_path, partial_path=partial_path)
+    with running_server(payload=PAYLOAD) as server:
+        first = fetch_from_arcgis_api(url=server.csv_url, **paths)
+        assert not partial_path.exists()
+
+        os.utime(cache_path, (0, 0))
+        second = fetch_from_arcgis_api(url=server.csv_url, **paths)
+        last_request = server.request_log[-1][1]
+
+    assert last_request.get("If-None-Match") == server.etag
+    assert time.time() - cache_path.stat().st_mtime < 60
+    assert not partial_path.exists()
+    assert len(second) == len(first)
+
+
+def test_changed_upstream_is_downloaded_again(tmp_path):
+    cache_path = tmp_path / "cache.csv"
+    paths = dict(cache_path=cache_path, partial_path=tmp_path / "download.part")
+    with running_server(payload=PAYLOAD) as server:
+        fetch_from_arcgis_api(url=server.csv_url, **paths)
+        server.set_payload(make_portwatch_csv(ports=41, days=100))
+        os.utime(cache_path, (0, 0))
+        df = fetch_from_arcgis_api(url=server.csv_url, **paths)
+
+    assert len(df) == 41 * 100
+
+
+def test_download_matches_direct_parse(tmp_path):
+    (tmp_path / "expected.csv").write_bytes(PAYLOAD)
+    with running_server(payload=PAYLOAD, fail_after_bytes=len(PAYLOAD) // 2, failures=1) as server:
+        download_csv(server.csv_url, dest=tmp_path / "download.part", backoff=0.01)
+
+    expected = read_csv_export(tmp_path / "expected.csv")
+    assert read_csv_export(tmp_path / "download.part").equals(expected)
+
+
+# -------------------------
+# Header Parsing
+# -------------------------
+def test_retry_after_seconds():
+    assert retry_after_seconds("3") == 3
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+def test_content_range_start():
+    assert content_range_start("bytes 100-199/200") == 100
+    assert content_range_start("bytes 0-9/*") == 0
+    assert content_range_start("bytes */200") is None
+    assert content_range_start(None) is None
@@ -0,0 +1,115 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.data_loader import fetch_from_feature_service, fetch_records
+from src.mock_arcgis import make_portwatch_csv, running_server
+
+PAYLOAD = make_portwatch_csv(ports=20, days=300)  # 6,000 rows
+
+
+def page_offsets(server) -> list:
+    offsets = []
+    for path, _ in server.request_log:
+        params = parse_qs(urlparse(path).query)
+        if "resultOffset" in params:
+            offsets.append(int(params["resultOffset"][0]))
+    return offsets
+
+
+def load(server, cache_dir, **kwargs):
+    return fetch_from_feature_service(server.query_url, cache_dir=cache_dir, **kwargs)
+
+
+# -------------------------
+# Paging
+# -------------------------
+def test_page_size_is_capped_to_max_record_count(tmp_path):
+    with running_server(payload=PAYLOAD, max_record_count=1000) as server:
+        df = load(server, tmp_path, page_size=2000)
+
+    assert len(df) == 6000
+    assert df["OBJECTID"].is_unique
+    assert sorted(set(page_offsets(server))) == list(range(0, 6000, 1000))
+
+
+def test_short_pages_are_repaged(tmp_path):
+    with running_server(payload=PAYLOAD, max_record_count=700) as server:
+        df = fetch_records(server.query_url, 0, 2000)
+
+    assert len(df) == 2000
+    assert list(df["ObjectId"]) == list(range(1, 2001))
+
+
+def test_short_result_raises(tmp_path):
+    with running_server(payload=PAYLOAD) as server:
+        with pytest.raises(RuntimeError, match="Short page"):
+            fetch_records(server.query_url, 5500, 1000)
+
+
+def test_empty_layer_returns_empty_frame(tmp_path):
+    with running_server(payload=make_portwatch_csv(ports=0, days=10)) as server:
+        df = load(server, tmp_path)
+
+    assert df.empty
+    assert {"DATE", "PORT", "TRAFFIC"}.issubset(df.columns)
+
+
+# -------------------------
+# Retries and Resume
+# -------------------------
+def test_failed_partition_is_retried_in_rounds(tmp_path):
+    with running_server(payload=PAYLOAD, failing_offsets={2000: 1}) as server:
+        df = load(server, tmp_path, max_attempts=2)
+
+    assert len(df) == 6000
+    assert page_offsets(server).count(2000) == 2
+    assert page_offsets(server).count(0) == 1
+
+
+def test_interrupted_run_resumes_only_failed_partitions(tmp_path):
+    with running_server(payload=PAYLOAD, failing_offsets={2000: 1}) as server:
+        with pytest.raises(RuntimeError, match="partitions failed"):
+            load(server, tmp_path, max_attempts=1)
+        server.request_log.clear()
+
+        df = load(server, tmp_path, max_attempts=1)
+
+    assert len(df) == 6000
+    assert page_offsets(server) == [2000]
+
+
+# -------------------------
+# Cache Validity
+# -------------------------
+def test_completed_cache_is_reused(tmp_path):
+    with running_server(payload=PAYLOAD) as server:
+        first = load(server, tmp_path)
+        server.request_log.clear()
+        second = load(server, tmp_path)
+
+    assert page_offsets(server) == []
+    assert second.equals(first)
+
+
+def test_upstream_edit_invalidates_cache(tmp_path):
+    with running_server(payload=PAYLOAD) as server:
+        load(server, tmp_path)
+        server.set_payload(make_portwatch_csv(ports=20, days=300, seed=7), last_modified=server.last_modified + 60)
+        server.request_log.clear()
+        load(server, tmp_path)
+
+    assert sorted(page_offsets(server)) == [0, 2000, 4000]
+
+
+def test_cache_is_keyed_on_layer(tmp_path):
+    other = make_portwatch_csv(ports=20, days=300, seed=7)
+    with running_server(payload=PAYLOAD) as first, running_server(payload=other) as second:
+        second.set_payload(other, last_modified=first.last_modified)
+        load(first, tmp_path)
+        df = load(second, tmp_path)
+        expected = load(second, tmp_path / "fresh")
+
+    # Same count and lastEditDate, different layer: must not share partitions.
+    assert page_offsets(second)
+    assert df.equals(expected)
@@ -0,0 +1,110 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import materialize
+from src.materialize import (
+    CURRENT_POINTER,
+    MANIFEST_FILE,
+    Snapshot,
+    SnapshotStore,
+    prune_snapshots,
+    read_current_version,
+    write_snapshot
+)
+
+
+def hidden_entries(root) -> list:
+    return [p.name for p in root.iterdir() if p.name.startswith(".")]
+
+
+# -------------------------
+# Publishing
+# -------------------------
+def test_write_snapshot_publishes_and_points_current(tmp_path, engineered):
+    target = write_snapshot(engineered, root=tmp_path, years=1, sample_fraction=0.05)
+
+    assert read_current_version(tmp_path) == target.name
+    assert hidden_entries(tmp_path) == []
+    manifest = json.loads((target / MANIFEST_FILE).read_text())
+    assert manifest["record_count"] == len(engineered)
+    assert manifest["sample_fraction"] == 0.05
+    assert pd.Timestamp(manifest["default_end"]) == engineered["DATE"].max()
+    assert pd.Timestamp(manifest["default_start"]) == engineered["DATE"].max() - pd.DateOffset(years=1)
+
+
+def test_failed_write_leaves_current_untouched(tmp_path, engineered, monkeypatch):
+    first = write_snapshot(engineered, root=tmp_path)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(materialize, "build_artifacts", broken)
+    with pytest.raises(RuntimeError, match="boom"):
+        write_snapshot(engineered, root=tmp_path)
+
+    assert read_current_version(tmp_path) == first.name
+    assert hidden_entries(tmp_path) == []
+    assert [p.name for p in tmp_path.iterdir() if p.is_dir()] == [first.name]
+
+
+def test_prune_keeps_newest_and_current(tmp_path, engineered):
+    versions = [write_snapshot(engineered, root=tmp_path, keep=0).name for _ in range(3)]
+
+    # Point back at the oldest, as an operator rolling back would.
+    (tmp_path / CURRENT_POINTER).write_text(versions[0])
+    prune_snapshots(tmp_path, keep=1)
+
+    remaining = sorted(p.name for p in tmp_path.iterdir() if p.is_dir())
+    assert remaining == [versions[0], versions[2]]
+
+
+# -------------------------
+# Hot Reload
+# -------------------------
+def test_store_swaps_to_new_snapshot_on_current_change(tmp_path, engineered):
+    store = SnapshotStore(tmp_path)
+    assert store.refresh() is None
+
+    write_snapshot(engineered, root=tmp_path)
+    first = store.refresh()
+    assert first is not None and len(first.data) == len(engineered)
+    assert store.refresh() is first  # unchanged pointer: no reload
+
+    smaller = engineered[engineered["PORT"] != engineered["PORT"].iloc[0]]
+    second_path = write_snapshot(smaller, root=tmp_path)
+    second = store.refresh()
+
+    assert second is not first
+    assert second.version == second_path.name
+    assert len(second.data) == len(smaller)
+    # Readers still holding the old snapshot keep a working view.
+    assert len(first.data) == len(engineered)
+
+
+def test_store_keeps_serving_when_new_snapshot_is_unreadable(tmp_path, engineered):
+    store = SnapshotStore(tmp_path)
+    write_snapshot(engineered, root=tmp_path)
+    current = store.refresh()
+
+    (tmp_path / CURRENT_POINTER).write_text("missing-version")
+
+    assert store.refresh() is current
+
+
+# -------------------------
+# Default View
+# -------------------------
+def test_default_view_matches_the_materialized_window(tmp_path, engineered):
+    snapshot = Snapshot(write_snapshot(engineered, root=tmp_path, years=1))
+
+    assert snapshot.is_default_view(None, snapshot.default_start, snapshot.default_end)
+    assert not snapshot.is_default_view(["Port 1"], snapshot.default_start, snapshot.default_end)
+
+    view = snapshot.default_view("TRAFFIC", columns=["DATE", "PORT", "TRAFFIC"])
+    in_window = engineered["DATE"].between(snapshot.default_start, snapshot.default_end)
+    assert list(view.columns) == ["DATE", "PORT", "TRAFFIC", "ANOMALY"]
+    assert len(view) == in_window.sum()
+    assert view["PORT"].dtype == object
+    assert set(snapshot.artifacts) == set(materialize.METRICS)
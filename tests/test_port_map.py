@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from src.analytics import MAP_CELLS_AT_ZOOM_0, aggregate_port_locations, bin_port_locations
+from src.data_loader import fetch_port_locations
+from src.mock_arcgis import make_portwatch_csv, running_server
+from src.preprocess import join_port_locations
+
+
+def ports_frame(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=['PORT_ID', 'PORT', 'LAT', 'LON', 'TRAFFIC'])
+
+
+# -------------------------
+# Port Locations
+# -------------------------
+def test_fetch_port_locations_pages_past_max_record_count(tmp_path):
+    with running_server(payload=make_portwatch_csv(ports=3000, days=1), max_record_count=1000) as server:
+        locations = fetch_port_locations(url=server.ports_url, cache_path=tmp_path / "ports.csv")
+
+    assert len(locations) == 3000
+    assert locations['PORT_ID'].is_unique
+    assert (tmp_path / "ports.csv").exists()
+
+
+def test_fetch_port_locations_never_returns_a_partial_table(tmp_path):
+    with running_server(payload=make_portwatch_csv(ports=30, days=1), max_record_count=10,
+                        failing_offsets={10: 99}) as server:
+        locations = fetch_port_locations(url=server.ports_url, cache_path=tmp_path / "ports.csv")
+
+    assert locations.empty
+    assert list(locations.columns) == ['PORT_ID', 'LAT', 'LON']
+
+
+def test_join_port_locations_keeps_rows_and_order():
+    df = pd.DataFrame({'PORT_ID': ['b', 'a', 'c', 'a'], 'TRAFFIC': [1, 2, 3, 4]}, index=[10, 11, 12, 13])
+    locations = pd.DataFrame({'PORT_ID': ['a', 'b'], 'LAT': [1.0, 2.0], 'LON': [10.0, 20.0]})
+
+    joined = join_port_locations(df, locations)
+
+    assert list(joined.index) == [10, 11, 12, 13]
+    assert list(joined['LAT'].fillna(-1)) == [2.0, 1.0, -1, 1.0]
+
+
+# -------------------------
+# Aggregation
+# -------------------------
+def test_ports_sharing_a_name_stay_separate():
+    df = pd.DataFrame({
+        'PORT_ID': ['port1', 'port1', 'port2'],
+        'PORT': ['Victoria', 'Victoria', 'Victoria'],
+        'COUNTRY': ['Canada', 'Canada', 'Seychelles'],
+        'LAT': [48.4, 48.4, -4.6],
+        'LON': [-123.4, -123.4, 55.5],
+        'TRAFFIC': [1, 2, 5]
+    })
+
+    ports = aggregate_port_locations(df).set_index('PORT_ID')
+
+    assert len(ports) == 2
+    assert ports.loc['port1', 'TRAFFIC'] == 3
+    assert (ports.loc['port2', 'LAT'], ports.loc['port2', 'LON']) == (-4.6, 55.5)
+    assert set(ports['PORT']) == {'Victoria'}
+
+
+# -------------------------
+# Binning
+# -------------------------
+def test_nearby_ports_cluster_at_low_zoom_and_split_when_zoomed_in():
+    ports = ports_frame([('p1', 'A', 10.0, 10.0, 5), ('p2', 'B', 10.5, 10.5, 7)])
+
+    clustered = bin_port_locations(ports, zoom=0)
+    assert len(clustered) == 1
+    assert clustered.loc[0, 'TRAFFIC'] == 12
+    assert clustered.loc[0, 'PORT_COUNT'] == 2
+    assert clustered.loc[0, 'LABEL'] == "2 ports"
+
+    # Each zoom level halves the cell size; at zoom 6 a cell spans under 0.2°.
+    assert 360 / (MAP_CELLS_AT_ZOOM_0 * 2 ** 6) < 0.2
+    split = bin_port_locations(ports, zoom=6)
+    assert sorted(split['LABEL']) == ['A', 'B']
+
+
+def test_bounds_keep_only_visible_ports():
+    ports = ports_frame([('p1', 'Inside', 0.0, 0.0, 1), ('p2', 'North', 60.0, 0.0, 1),
+                         ('p3', 'East', 0.0, 100.0, 1)])
+
+    visible = bin_port_locations(ports, zoom=6, bounds=(-10, -10, 10, 10))
+
+    assert list(visible['LABEL']) == ['Inside']
+
+
+def test_bounds_across_the_antimeridian():
+    ports = ports_frame([('p1', 'Fiji', -17.0, 178.0, 1), ('p2', 'Samoa', -13.8, -171.8, 1),
+                         ('p3', 'Lima', -12.0, -77.0, 1)])
+
+    # Plotly reports unwrapped longitudes (> 180) when the view crosses the antimeridian.
+    visible = bin_port_locations(ports, zoom=6, bounds=(170, -30, 195, 0))
+
+    assert sorted(visible['LABEL']) == ['Fiji', 'Samoa']
+
+
+def test_point_count_is_capped_to_the_largest_cells():
+    rng = np.random.default_rng(0)
+    ports = ports_frame([(f'p{i}', f'P{i}', rng.uniform(-60, 60), rng.uniform(-180, 180), i)
+                         for i in range(2000)])
+
+    points = bin_port_locations(ports, zoom=8, max_points=50)
+
+    assert len(points) == 50
+    assert points['TRAFFIC'].is_monotonic_decreasing
+    assert points['TRAFFIC'].min() >= ports['TRAFFIC'].nlargest(50).min()
+
+
+def test_empty_viewport_returns_an_empty_frame():
+    ports = ports_frame([('p1', 'A', 0.0, 0.0, 1)])
+
+    points = bin_port_locations(ports, bounds=(50, 50, 60, 60))
+
+    assert points.empty
+    assert list(points.columns) == ['LAT', 'LON', 'TRAFFIC', 'PORT_COUNT', 'LABEL']